@@ -8,66 +8,124 @@ View and analyze AI debug sessions logged by ReflexRuntime.
 
 import sys
 import os
+import re
+import heapq
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import subprocess
 from pathlib import Path
 
 # Add reflexruntime to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from reflexruntime.core.debug_logger import get_debug_logger
+from reflexruntime.core.debug_logger import (
+    SESSION_HEADER_MAX_BYTES, get_debug_logger, parse_session_header
+)
+
+# Session filenames are program_function_epoch.md. The program name may
+# contain underscores itself, so only the last two fields are positional.
+FILENAME_RE = re.compile(r'(?P<program>.+)_(?P<function>[^_]+)_(?P<epoch>\d+)\.md')
+
+# Report lines look like "**Status:** SUCCESS"; each field label maps to
+# the name it is cached under. Reports are scanned as raw bytes and only
+# matched values are decoded.
+FIELD_KEYS = {
+    b'Status': 'status',
+    b'Timestamp': 'timestamp',
+    b'Program': 'program',
+    b'Function': 'function',
+    b'Type': 'exc_type',
+    b'Confidence': 'confidence',
+    b'Explanation': 'explanation',
+}
+FIELD_RE = re.compile(rb'\*\*(' + b'|'.join(FIELD_KEYS) + rb'):\*\* (.*)')
+
+# Labels written in the report header, ahead of any code blocks
+HEADER_LABELS = (b'Status', b'Timestamp', b'Program', b'Function', b'Type')
+
+# Header fields are looked for in this many leading lines only
+HEADER_SCAN_LINES = 100
+
+# No extracted field appears after this section heading
+REPORT_END_MARKER = b'## Patch Application'
+
+# Reports larger than this are memory-mapped rather than read
+MMAP_MIN_SIZE = mmap.PAGESIZE
+
+# Uncached reports are parsed on a thread pool once there are this many,
+# and handed to a single grep process once there are GREP_MIN_FILES
+PARALLEL_MIN_FILES = 8
+PARALLEL_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+GREP_MIN_FILES = 64
+GREP_BATCH_SIZE = 512
+GREP_PATTERN = '^' + FIELD_RE.pattern.decode('ascii')
+
+# Fields shown by show_session_summary, in report order
+SUMMARY_FIELDS = (
+    ('Status', 'status'),
+    ('Timestamp', 'timestamp'),
+    ('Function', 'function'),
+    ('Exception', 'exc_type'),
+    ('AI Confidence', 'confidence'),
+    ('AI Explanation', 'explanation'),
+)
 
 
 def main():
     """Main debug viewer interface."""
     debug_logger = get_debug_logger()
     
-    print("ReflexRuntime Debug Session Viewer")
-    print("=" * 50)
+    # Output is collected and written in one go rather than line by line
+    lines = ["ReflexRuntime Debug Session Viewer", "=" * 50]
     
     # Get statistics
     stats = debug_logger.get_session_stats()
-    print(f"Session Statistics:")
-    print(f"   Total Sessions: {stats['total_sessions']}")
-    print(f"   Successful: {stats['successful_sessions']}")
-    print(f"   Failed: {stats['failed_sessions']}")
-    print(f"   Success Rate: {stats['success_rate']:.1f}%")
+    lines.append(f"Session Statistics:")
+    lines.append(f"   Total Sessions: {stats['total_sessions']}")
+    lines.append(f"   Successful: {stats['successful_sessions']}")
+    lines.append(f"   Failed: {stats['failed_sessions']}")
+    lines.append(f"   Success Rate: {stats['success_rate']:.1f}%")
     
     # List recent sessions
-    sessions = debug_logger.list_debug_sessions()
+    records = _scan_sessions(debug_logger)
     
-    if not sessions:
-        print("\nNo debug sessions found.")
-        print("Run some ReflexRuntime demos to generate debug logs!")
+    if not records:
+        lines.append("\nNo debug sessions found.")
+        lines.append("Run some ReflexRuntime demos to generate debug logs!")
+        _write_lines(lines)
         return
     
-    print(f"\nRecent Debug Sessions ({len(sessions)} total):")
-    print("-" * 50)
+    lines.append(f"\nRecent Debug Sessions ({len(records)} total):")
+    lines.append("-" * 50)
     
-    for i, session_file in enumerate(sessions[:10], 1):  # Show last 10
-        # Parse filename: program_function_epoch.md
-        parts = session_file.replace('.md', '').split('_')
-        if len(parts) >= 3:
-            program = parts[0]
-            function = parts[1]
-            epoch = parts[2]
+    # Show last 10, most recently written first
+    sessions = heapq.nlargest(10, records, key=lambda name: records[name][0])
+    for i, session_file in enumerate(sessions, 1):
+        match = FILENAME_RE.fullmatch(session_file)
+        if match:
+            program, function = match.group('program', 'function')
             
             # Check if successful
-            filepath = os.path.join(debug_logger.debug_dir, session_file)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    status = "[SUCCESS]" if "**Status:** SUCCESS" in content else "[FAILED]"
-            except Exception:
+            fields = records[session_file][1]
+            if fields is None:
                 status = "[UNKNOWN]"
+            else:
+                status = "[SUCCESS]" if fields.get('status') == 'SUCCESS' else "[FAILED]"
+                # The report header names both unambiguously
+                program = fields.get('program') or program
+                function = fields.get('function', function).rsplit('.', 1)[-1]
             
-            print(f"{i:2d}. {status} {program}.{function} ({session_file})")
+            lines.append(f"{i:2d}. {status} {program}.{function} ({session_file})")
         else:
-            print(f"{i:2d}. {session_file}")
+            lines.append(f"{i:2d}. {session_file}")
     
-    if len(sessions) > 10:
-        print(f"    ... and {len(sessions) - 10} more sessions")
+    if len(records) > 10:
+        lines.append(f"    ... and {len(records) - 10} more sessions")
     
-    print(f"\nDebug files location: {debug_logger.debug_dir}/")
-    print("Use any markdown viewer to see detailed session reports!")
+    lines.append(f"\nDebug files location: {debug_logger.debug_dir}/")
+    lines.append("Use any markdown viewer to see detailed session reports!")
+    _write_lines(lines)
     
     # Interactive mode
     while True:
@@ -81,107 +139,251 @@ def main():
         else:
             try:
                 session_num = int(choice)
-                if 1 <= session_num <= min(10, len(sessions)):
+                if 1 <= session_num <= len(sessions):
                     show_session_summary(debug_logger, sessions[session_num - 1])
                 else:
-                    print(f"ERROR: Invalid session number. Please enter 1-{min(10, len(sessions))}")
+                    print(f"ERROR: Invalid session number. Please enter 1-{len(sessions)}")
             except ValueError:
                 print("ERROR: Invalid input. Please enter a number, 'stats', or 'quit'")
 
 
 def show_detailed_stats(debug_logger):
     """Show detailed statistics about debug sessions."""
-    sessions = debug_logger.list_debug_sessions()
+    records = _scan_sessions(debug_logger)
     
-    if not sessions:
+    if not records:
         print("No sessions to analyze.")
         return
     
-    print("\nDetailed Statistics:")
-    print("-" * 30)
-    
     # Analyze sessions
     by_exception = {}
     by_program = {}
     successful_patches = 0
     
-    for session_file in sessions:
-        try:
-            filepath = os.path.join(debug_logger.debug_dir, session_file)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-                # Extract exception type and program
-                lines = content.split('\n')
-                exc_type = None
-                program = None
-                success = "**Status:** SUCCESS" in content
-                
-                for line in lines:
-                    if line.startswith('**Type:**'):
-                        exc_type = line.split('`')[1] if '`' in line else 'Unknown'
-                    elif line.startswith('**Program:**'):
-                        program = line.split('**Program:**')[1].strip()
-                
-                if exc_type:
-                    if exc_type not in by_exception:
-                        by_exception[exc_type] = {'total': 0, 'success': 0}
-                    by_exception[exc_type]['total'] += 1
-                    if success:
-                        by_exception[exc_type]['success'] += 1
-                        successful_patches += 1
-                
-                if program:
-                    if program not in by_program:
-                        by_program[program] = {'total': 0, 'success': 0}
-                    by_program[program]['total'] += 1
-                    if success:
-                        by_program[program]['success'] += 1
-                        
-        except Exception as e:
+    for _, fields in records.values():
+        if fields is None:
             continue
+        
+        exc_type = fields.get('exc_type')
+        program = fields.get('program')
+        success = fields.get('status') == 'SUCCESS'
+        
+        if exc_type:
+            exc_type = exc_type.split('`')[1] if '`' in exc_type else 'Unknown'
+            if exc_type not in by_exception:
+                by_exception[exc_type] = {'total': 0, 'success': 0}
+            by_exception[exc_type]['total'] += 1
+            if success:
+                by_exception[exc_type]['success'] += 1
+                successful_patches += 1
+        
+        if program:
+            if program not in by_program:
+                by_program[program] = {'total': 0, 'success': 0}
+            by_program[program]['total'] += 1
+            if success:
+                by_program[program]['success'] += 1
     
-    print(f"Exception Types:")
+    lines = ["\nDetailed Statistics:", "-" * 30, "Exception Types:"]
     for exc_type, stats in by_exception.items():
         success_count = stats['success']
         total_count = stats['total']
         success_rate = (success_count / total_count) * 100 if total_count > 0 else 0
-        print(f"   {exc_type}: {total_count} occurrences ({success_count} fixed, {success_rate:.1f}%)")
+        lines.append(f"   {exc_type}: {total_count} occurrences ({success_count} fixed, {success_rate:.1f}%)")
+    _write_lines(lines)
 
 
 def show_session_summary(debug_logger, session_file):
     """Show a summary of a specific debug session."""
+    filepath = os.path.join(debug_logger.debug_dir, session_file)
+    lines = [f"\nSession Summary: {session_file}", "-" * 50]
+    
+    try:
+        fields = _session_fields(debug_logger, session_file)
+    except Exception as e:
+        lines.append(f"ERROR: Error reading session file: {e}")
+    else:
+        for label, key in SUMMARY_FIELDS:
+            if key in fields:
+                lines.append(f"{label}: {fields[key]}")
+        lines.append(f"\nFull report available at: {filepath}")
+    
+    _write_lines(lines)
+
+
+def _write_lines(lines):
+    """Write a block of output lines with a single stdout write."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _extract_fields(filepath, labels=FIELD_KEYS):
+    """Extract the given fields (all by default) of a session report.
+    
+    Reports with a header line are answered from that line alone. Older
+    reports larger than a page are memory-mapped and scanned in place
+    instead of being copied through the file object's read buffer.
+    """
+    with open(filepath, 'rb') as f:
+        header = parse_session_header(f.readline(SESSION_HEADER_MAX_BYTES))
+        if header is not None:
+            keys = {FIELD_KEYS[label] for label in labels}
+            return {key: value for key, value in header.items() if key in keys}
+        f.seek(0)
+        if os.fstat(f.fileno()).st_size > MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _scan_field_lines(iter(mm.readline, b''), labels)
+        return _scan_field_lines(f, labels)
+
+
+def _scan_field_lines(lines, labels):
+    """Extract fields from an iterable of raw report lines.
+    
+    Stops as soon as every requested field has been found, so the large
+    traceback and LLM response blocks are usually never read.
+    """
+    fields = {}
+    remaining = {label: FIELD_KEYS[label] for label in labels}
+    
+    for line_count, line in enumerate(lines, 1):
+        match = FIELD_RE.match(line)
+        if match is not None:
+            key = remaining.pop(match.group(1), None)
+            if key is not None:
+                fields[key] = match.group(2).strip().decode('utf-8', 'replace')
+                if not remaining:
+                    break
+        elif line.startswith(REPORT_END_MARKER):
+            break
+        
+        if line_count == HEADER_SCAN_LINES:
+            # Header fields always sit at the top of the report
+            for label in HEADER_LABELS:
+                remaining.pop(label, None)
+    
+    return fields
+
+
+def _read_header_fields(filepath):
+    """Extract the header fields of a report, or None if it cannot be read."""
     try:
-        filepath = os.path.join(debug_logger.debug_dir, session_file)
+        return _extract_fields(filepath, HEADER_LABELS)
+    except Exception:
+        return None
+
+
+def _grep_fields(paths):
+    """Extract the header fields of many reports with one grep per batch.
+    
+    Returns a mapping of path to fields, or None when grep is unavailable
+    or fails so the caller can fall back to _extract_fields().
+    """
+    grep = shutil.which('grep')
+    if grep is None:
+        return None
+    
+    results = {path: {} for path in paths}
+    for start in range(0, len(paths), GREP_BATCH_SIZE):
+        batch = paths[start:start + GREP_BATCH_SIZE]
+        try:
+            proc = subprocess.run(
+                [grep, '-H', '--null', '-E', GREP_PATTERN, '--', *batch],
+                capture_output=True
+            )
+        except OSError:
+            return None
+        # Exit status 1 only means no line matched
+        if proc.returncode > 1:
+            return None
         
-        print(f"\nSession Summary: {session_file}")
-        print("-" * 50)
+        for line in proc.stdout.split(b'\n'):
+            path, _, text = line.partition(b'\0')
+            match = FIELD_RE.match(text)
+            if match is not None:
+                key = FIELD_KEYS[match.group(1)]
+                fields = results.get(os.fsdecode(path))
+                if fields is not None and key not in fields:
+                    fields[key] = match.group(2).strip().decode('utf-8', 'replace')
+    
+    return results
+
+
+def _session_fields(debug_logger, session_file):
+    """Return the header fields of one session, from the index when current."""
+    filepath = os.path.join(debug_logger.debug_dir, session_file)
+    st = os.stat(filepath)
+    cached = debug_logger.load_session_index().get(session_file)
+    if (cached and not cached.get('header_only') and cached.get('mtime') == st.st_mtime_ns
+            and cached.get('size') == st.st_size):
+        return cached['fields']
+    return _extract_fields(filepath)
+
+
+def _scan_sessions(debug_logger):
+    """Map every session file to its ``(mtime_ns, fields)``.
+    
+    Fields are served from the index when the file's mtime and size are
+    unchanged; only new or modified files are opened and parsed. Files that
+    cannot be read have fields of None.
+    
+    The listing and stats views only use header fields, so uncached reports
+    are read no further than their header. Such index entries are marked
+    ``header_only`` and completed by _session_fields() when viewed.
+    """
+    debug_dir = debug_logger.debug_dir
+    index = debug_logger.load_session_index()
+    new_index = {}
+    records = {}
+    misses = []
+    
+    try:
+        with os.scandir(debug_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.md'):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    records[entry.name] = (0, None)
+                    continue
+                
+                cached = index.get(entry.name)
+                if (cached and cached.get('mtime') == st.st_mtime_ns
+                        and cached.get('size') == st.st_size):
+                    records[entry.name] = (st.st_mtime_ns, cached['fields'])
+                    new_index[entry.name] = cached
+                else:
+                    misses.append((entry, st))
+    except OSError:
+        return records
+    
+    paths = [entry.path for entry, _ in misses]
+    grepped = _grep_fields(paths) if len(paths) >= GREP_MIN_FILES else None
+    if grepped is not None:
+        parsed = [grepped[path] for path in paths]
+    elif len(paths) >= PARALLEL_MIN_FILES:
+        # Parsing is dominated by file I/O, which releases the GIL
+        with ThreadPoolExecutor(max_workers=PARALLEL_MAX_WORKERS) as pool:
+            parsed = list(pool.map(_read_header_fields, paths))
+    else:
+        parsed = [_read_header_fields(path) for path in paths]
+    
+    for (entry, st), fields in zip(misses, parsed):
+        records[entry.name] = (st.st_mtime_ns, fields)
+        if fields is None:
+            continue
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # Extract key information
-            lines = content.split('\n')
-            
-            for line in lines:
-                if line.startswith('**Status:**'):
-                    print(f"Status: {line.split('**Status:**')[1].strip()}")
-                elif line.startswith('**Timestamp:**'):
-                    print(f"Timestamp: {line.split('**Timestamp:**')[1].strip()}")
-                elif line.startswith('**Function:**'):
-                    print(f"Function: {line.split('**Function:**')[1].strip()}")
-                elif line.startswith('**Type:**'):
-                    print(f"Exception: {line.split('**Type:**')[1].strip()}")
-                elif line.startswith('**Confidence:**'):
-                    print(f"AI Confidence: {line.split('**Confidence:**')[1].strip()}")
-                elif line.startswith('**Explanation:**'):
-                    explanation = line.split('**Explanation:**')[1].strip()
-                    print(f"AI Explanation: {explanation}")
-            
-            print(f"\nFull report available at: {filepath}")
-            
-    except Exception as e:
-        print(f"ERROR: Error reading session file: {e}")
+        new_index[entry.name] = {
+            'mtime': st.st_mtime_ns,
+            'size': st.st_size,
+            'fields': fields,
+        }
+        if grepped is None:
+            new_index[entry.name]['header_only'] = True
+    
+    if new_index != index:
+        debug_logger.replace_session_index(new_index, index)
+    
+    return records
 
 
 if __name__ == "__main__":
@@ -11,15 +11,27 @@ import os
 import signal
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from reflexruntime.core.orchestrator import activate_reflex_runtime
+from reflexruntime.core.orchestrator import activate_reflex_runtime, get_simple_orchestrator
 
 # Activate ReflexRuntime 
 activate_reflex_runtime(debug=False)
+_ORCH = get_simple_orchestrator()
 
 def divide_numbers(a: float, b: float) -> float:
     """Simple division function that will self-heal."""
     return a / b
 
+def _read_float(prompt: str) -> float:
+    """Prompt until the user enters a valid number."""
+    while True:
+        text = input(prompt).strip()
+        if text:
+            try:
+                return float(text)
+            except ValueError:
+                pass
+        print("Please enter a valid number")
+
 def signal_handler(signum, frame):
     """Handle Ctrl+C gracefully."""
     print("\n\nGoodbye! 👋")
@@ -28,6 +40,8 @@ def signal_handler(signum, frame):
 def main():
     """Interactive calculator that shows self-healing."""
     signal.signal(signal.SIGINT, signal_handler)
+    handle = _ORCH.handle
+    divide = divide_numbers
     
     print("🧮 ReflexRuntime Calculator")
     print("=" * 40)
@@ -41,39 +55,31 @@ def main():
         print(f"--- Calculation #{calculation_count} ---")
         
         try:
-            a = float(input("First number:  "))
-            b = float(input("Second number: "))
-        except ValueError:
-            print("Please enter valid numbers")
-            continue
+            a = _read_float("First number:  ")
+            b = _read_float("Second number: ")
         except KeyboardInterrupt:
             break
         
         # Let division errors bubble up to ReflexRuntime
         try:
-            result = divide_numbers(a, b)
+            result = divide(a, b)
             print(f"Result: {a} ÷ {b} = {result}")
-            
-            if b == 0:
-                print("✨ Amazing! Division by zero was automatically fixed!")
         except ZeroDivisionError as e:
             print(f"⚡ Caught {type(e).__name__}: {e}")
             print("🔧 Triggering ReflexRuntime healing...")
             
             # Manually trigger ReflexRuntime 
-            import sys
-            from reflexruntime.core.orchestrator import get_simple_orchestrator
-            
             exc_type, exc_value, exc_tb = sys.exc_info()
-            orchestrator = get_simple_orchestrator()
-            healed = orchestrator.handle(exc_type, exc_value, exc_tb)
+            healed = handle(exc_type, exc_value, exc_tb)
             
             if healed:
                 print("✅ Function healed! Trying again...")
-                # Try again with healed function
+                # Pick up the hot-swapped function once; later calculations reuse it
+                divide = sys.modules[__name__].divide_numbers
                 try:
-                    result = divide_numbers(a, b)
+                    result = divide(a, b)
                     print(f"🎉 Healed result: {a} ÷ {b} = {result}")
+                    print("✨ Amazing! Division by zero was automatically fixed!")
                 except Exception as e2:
                     print(f"⚠️ Still having issues: {e2}")
             else:
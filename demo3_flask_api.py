@@ -16,81 +16,249 @@ Features:
 - Failure injection controls
 - Performance metrics
 - CORS enabled for frontend
+
+Run with gunicorn (see gunicorn_conf.py) for concurrent request handling:
+    gunicorn -c gunicorn_conf.py demo3_flask_api:app
 """
 
+# Patch blocking calls (time.sleep, sockets) before anything imports them
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    pass
+
 import sys
 import os
 import time
+import math
 import random
 import json
-from datetime import datetime
+import gzip
+import hashlib
+import queue
+import threading
+import atexit
+import logging
+import logging.handlers
+from functools import wraps
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, abort, g, request
 from flask_cors import CORS
+from werkzeug.middleware.profiler import ProfilerMiddleware
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from reflexruntime.core.orchestrator import activate_reflex_runtime
 from reflexruntime.core.orchestrator import get_simple_orchestrator
 
 # Activate ReflexRuntime for the Flask app
 activate_reflex_runtime(debug=False)
+_ORCHESTRATOR = get_simple_orchestrator()
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend
-
-# Global state for failure injection
-failure_modes = {
-    'division_by_zero': False,
-    'missing_key': False, 
-    'wrong_data_type': False,
-    'slow_response': False
+CORS(app, resources={r"/api/*": {"origins": "*"}})  # Enable CORS for API routes only
+
+# Demo logging goes through a queue so handlers never write to stdout
+# on the request path; set DEMO3_LOG_LEVEL=DEBUG to see healing details
+log = logging.getLogger('reflexruntime.demo3')
+_log_level = os.environ.get('DEMO3_LOG_LEVEL', 'INFO').upper()
+if not isinstance(logging.getLevelName(_log_level), int):
+    print(f"WARNING: Unknown DEMO3_LOG_LEVEL {_log_level!r}, using INFO")
+    _log_level = 'INFO'
+log.setLevel(_log_level)
+log.propagate = False
+
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler(sys.stdout)
+_log_output.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_output)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# Optional per-request profiling; one .prof file per request is written to
+# PROFILE_DIR. Enable with REFLEX_PROFILE=1 or the /api/profile/* routes.
+PROFILE_DIR = os.environ.get('REFLEX_PROFILE_DIR', 'profiles')
+_base_wsgi_app = app.wsgi_app
+
+def set_profiling(enabled: bool):
+    """Wrap or unwrap the WSGI app in werkzeug's ProfilerMiddleware."""
+    if enabled:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        app.wsgi_app = ProfilerMiddleware(_base_wsgi_app, stream=None, profile_dir=PROFILE_DIR)
+    else:
+        app.wsgi_app = _base_wsgi_app
+
+if os.environ.get('REFLEX_PROFILE'):
+    set_profiling(True)
+
+# Global state for failure injection, packed into a single bitmask
+_DIV_BY_ZERO = 1 << 0
+_MISSING_KEY = 1 << 1
+_WRONG_DATA_TYPE = 1 << 2
+_SLOW_RESPONSE = 1 << 3
+
+_MODE_FLAGS = {
+    'division_by_zero': _DIV_BY_ZERO,
+    'missing_key': _MISSING_KEY,
+    'wrong_data_type': _WRONG_DATA_TYPE,
+    'slow_response': _SLOW_RESPONSE
 }
 
+_KNOWN_MODES = frozenset(_MODE_FLAGS)
+_failure_mask = 0
+
+# Private generator for injection and default values, with bound methods
+_rng = random.Random()
+_rand = _rng.random
+_uniform = _rng.uniform
+_randint = _rng.randint
+
+def get_failure_modes() -> dict:
+    """Expand the failure bitmask into the JSON shape clients use."""
+    mask = _failure_mask
+    return {name: bool(mask & flag) for name, flag in _MODE_FLAGS.items()}
+
 # Metrics tracking
-request_metrics = {
-    'total_requests': 0,
-    'successful_requests': 0,
-    'failed_requests': 0,
-    'avg_response_time': 0,
-    'last_error': None,
-    'patches_applied': 0
-}
+class Metrics:
+    """Request counters; the average response time is derived on read."""
+    
+    __slots__ = ('total_requests', 'successful_requests', 'failed_requests',
+                 'total_response_time_ns', 'last_error', 'patches_applied')
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Zero all counters in place."""
+        self.total_requests = 0
+        self.successful_requests = 0
+        self.failed_requests = 0
+        self.total_response_time_ns = 0
+        self.last_error = None
+        self.patches_applied = 0
+    
+    def to_dict(self) -> dict:
+        """Return the metrics in the JSON shape the dashboard expects."""
+        avg_response_time = 0
+        if self.successful_requests:
+            avg_response_time = self.total_response_time_ns / self.successful_requests / 1e6
+        return {
+            'total_requests': self.total_requests,
+            'successful_requests': self.successful_requests,
+            'failed_requests': self.failed_requests,
+            'avg_response_time': avg_response_time,
+            'last_error': self.last_error,
+            'patches_applied': self.patches_applied
+        }
+
+request_metrics = Metrics()
+
+# Live metrics subscribers (/api/metrics/stream). Each holds a one-slot
+# queue used as a "metrics changed" flag; the tuple is swapped, never
+# mutated, so notifiers can iterate it without a lock.
+METRICS_STREAM_INTERVAL = 1.0
+METRICS_STREAM_KEEPALIVE = 15.0
+_metrics_subscribers = ()
+_subscribers_lock = threading.Lock()
+
+def _subscribe_metrics() -> queue.Queue:
+    """Register a new metrics stream and return its change flag."""
+    global _metrics_subscribers
+    changed = queue.Queue(maxsize=1)
+    with _subscribers_lock:
+        _metrics_subscribers = _metrics_subscribers + (changed,)
+    return changed
+
+def _unsubscribe_metrics(changed: queue.Queue):
+    """Remove a metrics stream registered by _subscribe_metrics."""
+    global _metrics_subscribers
+    with _subscribers_lock:
+        _metrics_subscribers = tuple(q for q in _metrics_subscribers if q is not changed)
+
+def _notify_metrics_changed():
+    """Flag every open metrics stream; already-flagged streams are skipped."""
+    for changed in _metrics_subscribers:
+        try:
+            changed.put_nowait(True)
+        except queue.Full:
+            pass
 
 def track_request(func):
     """Decorator to track request metrics."""
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        request_metrics['total_requests'] += 1
+        metrics = request_metrics
+        start_time = time.perf_counter_ns()
+        metrics.total_requests += 1
         
         try:
             result = func(*args, **kwargs)
-            request_metrics['successful_requests'] += 1
-            response_time = (time.time() - start_time) * 1000
-            
-            # Update average response time
-            total_time = (request_metrics['avg_response_time'] * 
-                         (request_metrics['total_requests'] - 1) + response_time)
-            request_metrics['avg_response_time'] = total_time / request_metrics['total_requests']
-            
+            metrics.successful_requests += 1
+            metrics.total_response_time_ns += time.perf_counter_ns() - start_time
             return result
         except Exception as e:
-            request_metrics['failed_requests'] += 1
-            request_metrics['last_error'] = str(e)
+            metrics.failed_requests += 1
+            metrics.last_error = str(e)
             raise
+        finally:
+            if _metrics_subscribers:
+                _notify_metrics_changed()
     
-    wrapper.__name__ = func.__name__
     return wrapper
 
+# Request/response JSON helpers
+
+if orjson is not None:
+    _json_bytes = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_bytes(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    _json_loads = json.loads
+
+def _json(obj) -> Response:
+    """Build a JSON response, using orjson when it is installed."""
+    return Response(_json_bytes(obj), mimetype='application/json')
+
+def _json_raw(body: bytes) -> Response:
+    """Wrap an already-encoded JSON body in a response."""
+    return Response(body, mimetype='application/json')
+
+# Pre-encoded bodies for fixed-shape responses; each %s slot takes an
+# already JSON-encoded value
+_HEALTH_TMPL = b'{"status":"healthy","timestamp":"%s","reflexruntime":"active"}'
+_CALC_TMPL = b'{"operation":"division","a":%s,"b":%s,"result":%s,"timestamp":"%s","healed":%s}'
+_PARSE_TMPL = b'{"operation":"number_parsing","input":%s,"result":%s,"timestamp":"%s","healed":%s}'
+_JSON_BOOL = (b'false', b'true')
+
+_ts_cache = (0, '')
+
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601, formatted at most once per second."""
+    global _ts_cache
+    now = int(time.time())
+    cached_at, stamp = _ts_cache
+    if now != cached_at:
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+        _ts_cache = (now, stamp)
+    return stamp
+
 # API Functions that will be self-healed
 
 def calculate_division(a: float, b: float) -> float:
     """Division function that can fail with division by zero."""
-    if failure_modes['division_by_zero'] and random.random() < 0.3:
+    if _failure_mask & _DIV_BY_ZERO and _rand() < 0.3:
         b = 0  # Inject division by zero error
     return a / b
 
 def process_user_data(data: dict) -> dict:
     """Process user data that can have missing keys."""
-    if failure_modes['missing_key'] and random.random() < 0.3:
+    if _failure_mask & _MISSING_KEY and _rand() < 0.3:
         # Remove a random key to trigger KeyError
         if 'email' in data:
             del data['email']
@@ -99,74 +267,152 @@ def process_user_data(data: dict) -> dict:
         'user_id': data['user_id'],
         'username': data['username'], 
         'email': data['email'],
-        'processed_at': datetime.now().isoformat()
+        'processed_at': _now_iso()
     }
     return result
 
 def parse_number_data(value) -> int:
     """Parse number data that can have wrong types."""
-    if failure_modes['wrong_data_type'] and random.random() < 0.3:
+    if _failure_mask & _WRONG_DATA_TYPE and _rand() < 0.3:
         value = "not_a_number"  # Inject type error
     return int(value)
 
+# Opt-in defensive versions (DEMO3_GUARDED=1) that handle the injected
+# failures up front, as a healed patch would, so no exception is raised
+GUARDED_MODE = os.environ.get('DEMO3_GUARDED', '').lower() in ('1', 'true', 'yes')
+
+if GUARDED_MODE:
+    def calculate_division(a: float, b: float) -> float:
+        """Division that returns infinity instead of raising on a zero divisor."""
+        if _failure_mask & _DIV_BY_ZERO and _rand() < 0.3:
+            b = 0  # Inject division by zero error
+        return a / b if b else math.inf
+    
+    def process_user_data(data: dict) -> dict:
+        """Process user data, filling in missing keys with defaults."""
+        if _failure_mask & _MISSING_KEY and _rand() < 0.3:
+            if 'email' in data:
+                del data['email']
+        
+        result = {
+            'user_id': data.get('user_id'),
+            'username': data.get('username'),
+            'email': data.get('email', 'default@example.com'),
+            'processed_at': _now_iso()
+        }
+        return result
+    
+    def parse_number_data(value) -> int:
+        """Parse number data, returning 0 for values int() would reject."""
+        if _failure_mask & _WRONG_DATA_TYPE and _rand() < 0.3:
+            value = "not_a_number"  # Inject type error
+        try:
+            return int(value)
+        except (ValueError, TypeError, OverflowError):
+            return 0
+
+# Current implementation of each healable function, republished after a patch
+_HEALED_FUNCS = {
+    'calculate_division': calculate_division,
+    'process_user_data': process_user_data,
+    'parse_number_data': parse_number_data
+}
+
+# Healing outcomes per (function, exception type), so repeat failures
+# don't trigger another LLM round-trip until the entry expires
+HEAL_CACHE_TTL = 300.0
+_heal_cache = {}
+
+def _cached_heal(key):
+    """Return the cached healing outcome for key, or None if absent or expired."""
+    entry = _heal_cache.get(key)
+    if entry is None:
+        return None
+    healed, expires_at = entry
+    if time.monotonic() >= expires_at:
+        _heal_cache.pop(key, None)
+        return None
+    return healed
+
 def safe_api_call(func, *args, **kwargs):
     """Safely call an API function with ReflexRuntime healing."""
     try:
         return func(*args, **kwargs)
     except Exception as e:
-        print(f"DEBUG: Exception caught in safe_api_call: {type(e).__name__}: {e}")
+        log.debug("Exception caught in safe_api_call: %s: %s", type(e).__name__, e)
         
-        # Manually trigger ReflexRuntime healing
-        import sys
         exc_type, exc_value, exc_tb = sys.exc_info()
-        print(f"DEBUG: Triggering ReflexRuntime for {func.__name__}")
-        
-        orchestrator = get_simple_orchestrator()
-        healed = orchestrator.handle(exc_type, exc_value, exc_tb)
+        key = (func.__name__, exc_type.__name__)
+        healed = _cached_heal(key)
         
-        print(f"DEBUG: Healing result: {healed}")
+        if healed is None:
+            # Manually trigger ReflexRuntime healing
+            log.debug("Triggering ReflexRuntime for %s", func.__name__)
+            
+            healed = _ORCHESTRATOR.handle(exc_type, exc_value, exc_tb)
+            _heal_cache[key] = (healed, time.monotonic() + HEAL_CACHE_TTL)
+            
+            log.debug("Healing result: %s", healed)
+            
+            if healed:
+                # Update metrics and publish the patched function
+                request_metrics.patches_applied += 1
+                _HEALED_FUNCS[func.__name__] = globals().get(func.__name__, func)
+        else:
+            log.debug("Cached healing result for %s: %s", func.__name__, healed)
         
         if healed:
-            # Update metrics
-            request_metrics['patches_applied'] += 1
-            print(f"DEBUG: Function healed! Retrying {func.__name__}")
+            log.debug("Function healed! Retrying %s", func.__name__)
             
             # Try again with healed function
             try:
-                func_name = func.__name__
-                current_module = sys.modules[__name__]
-                patched_func = getattr(current_module, func_name)
+                patched_func = _HEALED_FUNCS.get(func.__name__, func)
                 result = patched_func(*args, **kwargs)
-                print(f"DEBUG: Retry successful for {func.__name__}")
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Retry successful for %s", func.__name__)
                 return result
             except Exception as retry_error:
-                print(f"DEBUG: Retry failed: {retry_error}")
+                log.debug("Retry failed: %s", retry_error)
                 # If still failing, return a safe default
                 return None
         else:
-            print(f"DEBUG: Could not heal {func.__name__}, returning default")
+            log.debug("Could not heal %s, returning default", func.__name__)
             # If couldn't heal, return safe default
             return None
 
 # API Routes
 
+@app.before_request
+def parse_json_body():
+    """Decode a JSON POST body once per request and keep it on flask.g."""
+    if request.method == 'POST' and request.content_length and request.is_json:
+        try:
+            g.json = _json_loads(request.get_data(cache=False))
+        except ValueError:
+            abort(400, description='Request body is not valid JSON')
+
+def _request_json() -> dict:
+    """Return the decoded POST body, or {} when the request had none.
+    
+    Like request.get_json(), a body that isn't application/json gets a 415.
+    """
+    if request.content_length and not request.is_json:
+        abort(415, description='Request body must be application/json')
+    return g.get('json') or {}
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'reflexruntime': 'active'
-    })
+    return _json_raw(_HEALTH_TMPL % _now_iso().encode('ascii'))
 
 @app.route('/api/calculate', methods=['POST'])
 @track_request
 def calculate():
     """Calculate division with potential division by zero."""
-    data = request.get_json()
+    data = _request_json()
     
-    if failure_modes['slow_response']:
-        time.sleep(random.uniform(0.1, 0.5))  # Simulate slow response
+    if _failure_mask & _SLOW_RESPONSE:
+        time.sleep(_uniform(0.1, 0.5))  # Simulate slow response
     
     a = float(data.get('a', 10))
     b = float(data.get('b', 2))
@@ -178,29 +424,29 @@ def calculate():
     if result is None:
         result = "Error handled gracefully"
     
-    return jsonify({
-        'operation': 'division',
-        'a': a,
-        'b': b,
-        'result': result,
-        'timestamp': datetime.now().isoformat(),
-        'healed': result == "Error handled gracefully" or request_metrics['patches_applied'] > 0
-    })
+    healed = result == "Error handled gracefully" or request_metrics.patches_applied > 0
+    return _json_raw(_CALC_TMPL % (
+        _json_bytes(a),
+        _json_bytes(b),
+        _json_bytes(result),
+        _now_iso().encode('ascii'),
+        _JSON_BOOL[healed]
+    ))
 
 @app.route('/api/process_user', methods=['POST'])
 @track_request
 def process_user():
     """Process user data with potential missing keys."""
-    data = request.get_json()
+    data = _request_json()
     
-    if failure_modes['slow_response']:
-        time.sleep(random.uniform(0.1, 0.5))
+    if _failure_mask & _SLOW_RESPONSE:
+        time.sleep(_uniform(0.1, 0.5))
     
-    # Default user data
+    # Default user data, generated only for fields the client left out
     user_data = {
-        'user_id': data.get('user_id', random.randint(1000, 9999)),
-        'username': data.get('username', f'user_{random.randint(100, 999)}'),
-        'email': data.get('email', f'user{random.randint(100, 999)}@example.com')
+        'user_id': data['user_id'] if 'user_id' in data else _randint(1000, 9999),
+        'username': data['username'] if 'username' in data else 'user_%d' % _randint(100, 999),
+        'email': data['email'] if 'email' in data else 'user%d@example.com' % _randint(100, 999)
     }
     
     # Use safe API call for self-healing
@@ -212,28 +458,28 @@ def process_user():
             'user_id': user_data['user_id'],
             'username': user_data['username'],
             'email': 'default@example.com',
-            'processed_at': datetime.now().isoformat(),
+            'processed_at': _now_iso(),
             'note': 'Processed with default values after healing'
         }
     
-    return jsonify({
+    return _json({
         'operation': 'user_processing',
         'input': user_data,
         'result': result,
-        'timestamp': datetime.now().isoformat(),
-        'healed': 'note' in result or request_metrics['patches_applied'] > 0
+        'timestamp': _now_iso(),
+        'healed': 'note' in result or request_metrics.patches_applied > 0
     })
 
 @app.route('/api/parse_number', methods=['POST'])
 @track_request
 def parse_number():
     """Parse number data with potential type errors."""
-    data = request.get_json()
+    data = _request_json()
     
-    if failure_modes['slow_response']:
-        time.sleep(random.uniform(0.1, 0.5))
+    if _failure_mask & _SLOW_RESPONSE:
+        time.sleep(_uniform(0.1, 0.5))
     
-    value = data.get('value', random.randint(1, 100))
+    value = data.get('value', _randint(1, 100))
     
     # Use safe API call for self-healing
     result = safe_api_call(parse_number_data, value)
@@ -242,53 +488,95 @@ def parse_number():
     if result is None:
         result = 0  # Default value
     
-    return jsonify({
-        'operation': 'number_parsing',
-        'input': value,
-        'result': result,
-        'timestamp': datetime.now().isoformat(),
-        'healed': result == 0 or request_metrics['patches_applied'] > 0
-    })
+    healed = result == 0 or request_metrics.patches_applied > 0
+    return _json_raw(_PARSE_TMPL % (
+        _json_bytes(value),
+        _json_bytes(result),
+        _now_iso().encode('ascii'),
+        _JSON_BOOL[healed]
+    ))
 
 @app.route('/api/failure_modes', methods=['GET', 'POST'])
 def manage_failure_modes():
     """Get or set failure mode toggles."""
+    global _failure_mask
     if request.method == 'POST':
-        data = request.get_json()
-        for key, value in data.items():
-            if key in failure_modes:
-                failure_modes[key] = bool(value)
-        return jsonify({'status': 'updated', 'failure_modes': failure_modes})
+        data = _request_json()
+        mask = _failure_mask
+        for key in data.keys() & _KNOWN_MODES:
+            flag = _MODE_FLAGS[key]
+            if data[key]:
+                mask |= flag
+            else:
+                mask &= ~flag
+        _failure_mask = mask
+        return _json({'status': 'updated', 'failure_modes': get_failure_modes()})
     
-    return jsonify(failure_modes)
+    return _json(get_failure_modes())
+
+def _metrics_snapshot() -> dict:
+    """Current metrics payload shared by the polling and streaming endpoints."""
+    return {
+        'metrics': request_metrics.to_dict(),
+        'failure_modes': get_failure_modes(),
+        'timestamp': _now_iso()
+    }
 
 @app.route('/api/metrics', methods=['GET'])
 def get_metrics():
     """Get current API metrics."""
-    return jsonify({
-        'metrics': request_metrics,
-        'failure_modes': failure_modes,
-        'timestamp': datetime.now().isoformat()
-    })
+    return _json(_metrics_snapshot())
+
+@app.route('/api/metrics/stream', methods=['GET'])
+def stream_metrics():
+    """Push metrics as server-sent events, at most once per interval."""
+    changed = _subscribe_metrics()
+    
+    def generate():
+        try:
+            yield b'data: ' + _json_bytes(_metrics_snapshot()) + b'\n\n'
+            while True:
+                try:
+                    changed.get(timeout=METRICS_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+                    continue
+                yield b'data: ' + _json_bytes(_metrics_snapshot()) + b'\n\n'
+                # Changes during the pause are coalesced into the next event
+                time.sleep(METRICS_STREAM_INTERVAL)
+        finally:
+            _unsubscribe_metrics(changed)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/heal_cache/clear', methods=['POST'])
+def clear_heal_cache():
+    """Forget cached healing outcomes so the next failure is re-analyzed."""
+    _heal_cache.clear()
+    return _json({'status': 'heal_cache_cleared'})
+
+@app.route('/api/profile/on', methods=['POST'])
+def profile_on():
+    """Start writing a profile for every request."""
+    set_profiling(True)
+    return _json({'status': 'profiling_on', 'profile_dir': os.path.abspath(PROFILE_DIR)})
+
+@app.route('/api/profile/off', methods=['POST'])
+def profile_off():
+    """Stop profiling requests."""
+    set_profiling(False)
+    return _json({'status': 'profiling_off'})
 
 @app.route('/api/reset_metrics', methods=['POST'])
 def reset_metrics():
     """Reset all metrics."""
-    global request_metrics
-    request_metrics = {
-        'total_requests': 0,
-        'successful_requests': 0,
-        'failed_requests': 0,
-        'avg_response_time': 0,
-        'last_error': None,
-        'patches_applied': 0
-    }
-    return jsonify({'status': 'metrics_reset'})
+    request_metrics.reset()
+    _notify_metrics_changed()
+    return _json({'status': 'metrics_reset'})
 
-@app.route('/')
-def index():
-    """Serve the frontend HTML."""
-    return """
+# Dashboard page, encoded and compressed once at import
+_DASHBOARD_HTML = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -528,7 +816,7 @@ def index():
         // Global state
         let loadTestActive = false;
         let loadTestInterval = null;
-        let metricsInterval = null;
+        let metricsSource = null;
         let lastMetrics = null;
 
         // API endpoints to test
@@ -596,44 +884,46 @@ def index():
             }
         }
 
+        function renderMetrics(data) {
+            const metrics = data.metrics;
+
+            // Update metric displays
+            document.getElementById('totalRequests').textContent = metrics.total_requests;
+            const successRate = metrics.total_requests > 0 
+                ? ((metrics.successful_requests / metrics.total_requests) * 100).toFixed(1)
+                : 100;
+            document.getElementById('successRate').textContent = successRate + '%';
+            document.getElementById('avgLatency').textContent = metrics.avg_response_time.toFixed(1) + 'ms';
+            document.getElementById('patchesApplied').textContent = metrics.patches_applied;
+
+            // Update chart
+            const now = new Date().toLocaleTimeString();
+            const successPerSec = lastMetrics 
+                ? Math.max(0, metrics.successful_requests - lastMetrics.successful_requests)
+                : 0;
+            const failedPerSec = lastMetrics 
+                ? Math.max(0, metrics.failed_requests - lastMetrics.failed_requests)
+                : 0;
+
+            chart.data.labels.push(now);
+            chart.data.datasets[0].data.push(successPerSec);
+            chart.data.datasets[1].data.push(failedPerSec);
+            chart.data.datasets[2].data.push(metrics.avg_response_time);
+
+            // Keep only last 20 data points
+            if (chart.data.labels.length > 20) {
+                chart.data.labels.shift();
+                chart.data.datasets.forEach(dataset => dataset.data.shift());
+            }
+
+            chart.update('none');
+            lastMetrics = metrics;
+        }
+
         async function updateMetrics() {
             try {
                 const response = await fetch('/api/metrics');
-                const data = await response.json();
-                const metrics = data.metrics;
-
-                // Update metric displays
-                document.getElementById('totalRequests').textContent = metrics.total_requests;
-                const successRate = metrics.total_requests > 0 
-                    ? ((metrics.successful_requests / metrics.total_requests) * 100).toFixed(1)
-                    : 100;
-                document.getElementById('successRate').textContent = successRate + '%';
-                document.getElementById('avgLatency').textContent = metrics.avg_response_time.toFixed(1) + 'ms';
-                document.getElementById('patchesApplied').textContent = metrics.patches_applied;
-
-                // Update chart
-                const now = new Date().toLocaleTimeString();
-                const successPerSec = lastMetrics 
-                    ? Math.max(0, metrics.successful_requests - lastMetrics.successful_requests)
-                    : 0;
-                const failedPerSec = lastMetrics 
-                    ? Math.max(0, metrics.failed_requests - lastMetrics.failed_requests)
-                    : 0;
-
-                chart.data.labels.push(now);
-                chart.data.datasets[0].data.push(successPerSec);
-                chart.data.datasets[1].data.push(failedPerSec);
-                chart.data.datasets[2].data.push(metrics.avg_response_time);
-
-                // Keep only last 20 data points
-                if (chart.data.labels.length > 20) {
-                    chart.data.labels.shift();
-                    chart.data.datasets.forEach(dataset => dataset.data.shift());
-                }
-
-                chart.update('none');
-                lastMetrics = metrics;
-
+                renderMetrics(await response.json());
             } catch (error) {
                 console.error('Failed to update metrics:', error);
             }
@@ -657,8 +947,9 @@ def index():
                 }
             }, 1000);
 
-            // Update metrics every second
-            metricsInterval = setInterval(updateMetrics, 1000);
+            // Metrics are pushed by the server while requests are flowing
+            metricsSource = new EventSource('/api/metrics/stream');
+            metricsSource.onmessage = event => renderMetrics(JSON.parse(event.data));
         }
 
         function stopLoadTest() {
@@ -673,9 +964,9 @@ def index():
                 loadTestInterval = null;
             }
             
-            if (metricsInterval) {
-                clearInterval(metricsInterval);
-                metricsInterval = null;
+            if (metricsSource) {
+                metricsSource.close();
+                metricsSource = null;
             }
             
             addActivity('Load test stopped', 'info');
@@ -711,7 +1002,31 @@ def index():
     </script>
 </body>
 </html>
-    """
+"""
+
+_DASHBOARD_BODY = _DASHBOARD_HTML.encode('utf-8')
+_DASHBOARD_GZIP = gzip.compress(_DASHBOARD_BODY, compresslevel=9)
+_DASHBOARD_ETAG = hashlib.md5(_DASHBOARD_BODY).hexdigest()
+
+@app.route('/')
+def index():
+    """Serve the frontend HTML."""
+    gzipped = 'gzip' in request.accept_encodings
+    etag = _DASHBOARD_ETAG + '-gzip' if gzipped else _DASHBOARD_ETAG
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif gzipped:
+        response = Response(_DASHBOARD_GZIP, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(_DASHBOARD_BODY, mimetype='text/html')
+    
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # Revalidate on every load so a restarted server's page is picked up
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 if __name__ == '__main__':
     print("=" * 60)
@@ -720,6 +1035,7 @@ if __name__ == '__main__':
     print("Starting Flask API with ReflexRuntime...")
     print("Open http://localhost:5000 to access the monitoring dashboard")
     print("The API will automatically heal itself when failures occur!")
+    print("For concurrent requests run: gunicorn -c gunicorn_conf.py demo3_flask_api:app")
     print("=" * 60)
     
     app.run(debug=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for the Demo 3 Flask API
+===============================================
+
+Usage:
+    gunicorn -c gunicorn_conf.py demo3_flask_api:app
+
+Uses gevent workers when gevent is installed so that slow endpoints
+(the slow_response failure mode sleeps) and open dashboard metric
+streams do not block other requests, and falls back to threaded workers
+otherwise.
+"""
+
+import os
+import multiprocessing
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+try:
+    import gevent  # noqa: F401
+    worker_class = "gevent"
+    worker_connections = 1000
+except ImportError:
+    # Not sync: each open /api/metrics/stream would pin a whole worker
+    worker_class = "gthread"
+    threads = 16
+
+# Failure modes, metrics and applied patches live in process memory, so
+# the dashboard only sees a consistent picture with a single worker.
+# Set WEB_CONCURRENCY=auto to scale out to 2 * CPU + 1 workers instead.
+_concurrency = os.environ.get("WEB_CONCURRENCY", "1")
+if _concurrency == "auto":
+    workers = multiprocessing.cpu_count() * 2 + 1
+else:
+    workers = int(_concurrency)
+
+# Healing waits on an LLM round-trip, which can outlast the 30s default
+timeout = 60
@@ -3,15 +3,128 @@ Debug logging system for ReflexRuntime AI analysis and patches.
 """
 
 import os
+import json
+import mmap
 import time
+import queue
+import atexit
+import bisect
+import logging
+import tempfile
+import threading
 from datetime import datetime
 from typing import Optional
 from .schemas import ErrorContext, PatchProposal
+from .formatting import format_local_vars
+
+log = logging.getLogger(__name__)
+
+# Sessions waiting for the background writer, as (logger, job) pairs
+WRITE_QUEUE_SIZE = 1024
+
+_write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+_writer_thread = None
+_writer_lock = threading.Lock()
+# Serializes session index updates from the writer thread, the synchronous
+# fallback path and re-indexing callers
+_index_lock = threading.RLock()
+
+
+def _writer_loop():
+    while True:
+        logger, job = _write_queue.get()
+        try:
+            logger._persist_session(*job)
+        finally:
+            _write_queue.task_done()
+
+
+def _start_writer():
+    """Start the session writer thread, or restart it after a fork."""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(
+                target=_writer_loop, name="reflexruntime-debug-writer", daemon=True
+            )
+            _writer_thread.start()
+
+
+def flush_debug_sessions():
+    """Block until every queued debug session has been written to disk."""
+    if _writer_thread is not None and _writer_thread.is_alive():
+        _write_queue.join()
+
+
+atexit.register(flush_debug_sessions)
+
+
+def _write_json_atomic(path: str, obj):
+    """Write obj as JSON to path via a uniquely named temp file and os.replace.
+    
+    A unique temp file per write means concurrent writers, including other
+    processes, never replace path with a partially written file.
+    """
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=os.path.dirname(path) or ".",
+            prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = f.name
+            json.dump(obj, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+# Every report starts with its header fields as one machine-readable line,
+# hidden from markdown renderers inside an HTML comment
+SESSION_HEADER_PREFIX = "<!--reflex:"
+SESSION_HEADER_SUFFIX = "-->"
+
+# Longest header line that is read back
+SESSION_HEADER_MAX_BYTES = 4096
+
+
+def format_session_header(fields: dict) -> str:
+    """Render a report's header line."""
+    # '>' only occurs inside JSON strings, so escaping it there keeps a
+    # stray "-->" from closing the comment early
+    payload = json.dumps(fields, separators=(',', ':')).replace('>', '\\u003e')
+    return f"{SESSION_HEADER_PREFIX}{payload}{SESSION_HEADER_SUFFIX}\n"
+
+
+def parse_session_header(line: bytes) -> Optional[dict]:
+    """Return the fields of a report's first line, or None if it has no header.
+    
+    Args:
+        line: First line of a report, as raw bytes
+    """
+    line = line.rstrip()
+    prefix = SESSION_HEADER_PREFIX.encode('ascii')
+    suffix = SESSION_HEADER_SUFFIX.encode('ascii')
+    if not (line.startswith(prefix) and line.endswith(suffix)):
+        return None
+    try:
+        fields = json.loads(line[len(prefix):-len(suffix)])
+    except ValueError:
+        return None
+    return fields if isinstance(fields, dict) else None
 
 
 class DebugLogger:
     """Logs AI analysis sessions and patches for debugging and audit purposes."""
     
+    # Index of per-session header fields, kept next to the session files
+    SESSION_INDEX_FILENAME = ".viewer_index.json"
+    
+    # Running session counters, so stats don't require reading every session
+    STATS_FILENAME = "stats.json"
+    
     def __init__(self, debug_dir: str = "debug"):
         """Initialize debug logger.
         
@@ -19,28 +132,43 @@ class DebugLogger:
             debug_dir: Directory to store debug logs
         """
         self.debug_dir = debug_dir
+        self._stats = None
+        self._stats_lock = threading.Lock()
+        # Session filenames in ascending order, valid while the directory
+        # mtime matches the one recorded when the listing was taken
+        self._sessions = None
+        self._sessions_mtime = None
+        self._sessions_lock = threading.Lock()
         self.ensure_debug_dir()
     
     def ensure_debug_dir(self):
         """Create debug directory if it doesn't exist."""
-        if not os.path.exists(self.debug_dir):
+        try:
             os.makedirs(self.debug_dir)
-            print(f"Created debug directory: {self.debug_dir}")
+        except FileExistsError:
+            return
+        log.debug("Created debug directory: %s", self.debug_dir)
     
     def log_ai_session(self, 
                       error_context: ErrorContext, 
                       patch_proposal: Optional[PatchProposal],
                       success: bool,
                       llm_response_raw: str = None,
-                      error_message: str = None):
+                      error_message: str = None,
+                      local_vars_json: str = None):
         """Log a complete AI analysis session.
         
+        The report is rendered immediately but written to disk by a
+        background thread, so the caller does not wait on file I/O. Use
+        flush_debug_sessions() to wait for pending writes.
+        
         Args:
             error_context: The original exception context
             patch_proposal: AI-generated patch proposal (if any)
             success: Whether the patch was successfully applied
             llm_response_raw: Raw LLM response for debugging
             error_message: Error message if patch failed
+            local_vars_json: Pre-rendered local variables, if already formatted
         """
         try:
             # Generate filename: program_function_epoch.md
@@ -50,23 +178,70 @@ class DebugLogger:
             
             filename = f"{program_name}_{function_name}_{epoch}.md"
             filepath = os.path.join(self.debug_dir, filename)
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            fields = self._session_fields(
+                error_context, patch_proposal, success, program_name, timestamp
+            )
             
             # Generate markdown content
             content = self._generate_debug_markdown(
-                error_context, patch_proposal, success, llm_response_raw, error_message
+                error_context, patch_proposal, success, llm_response_raw, error_message,
+                timestamp=timestamp, program_name=program_name,
+                local_vars_json=local_vars_json, fields=fields
             )
             
-            # Write to file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            job = (filename, filepath, content.encode('utf-8'), success, fields)
             
-            print(f"Debug session logged: {filename}")
+            _start_writer()
+            try:
+                _write_queue.put_nowait((self, job))
+            except queue.Full:
+                # Writer is falling behind; write on this thread instead
+                self._persist_session(*job)
             return filepath
             
         except Exception as e:
             print(f"WARNING: Failed to log debug session: {e}")
             return None
     
+    def _persist_session(self, filename: str, filepath: str, data: bytes,
+                         success: bool, fields: dict):
+        """Write a rendered session and update the stats, index and listing."""
+        try:
+            listing_current = self._listing_is_current()
+            
+            # Write to file: encode once, write in a single syscall
+            self._write_bytes(filepath, data)
+            
+            self._record_session_stats(success)
+            
+            # Record the header fields so viewers never need to parse the file
+            self._index_session(filename, filepath, fields)
+            
+            self._add_listed_session(filename, listing_current)
+            
+            print(f"Debug session logged: {filename}")
+        except Exception as e:
+            print(f"WARNING: Failed to log debug session: {e}")
+    
+    def _write_bytes(self, filepath: str, data: bytes):
+        """Write data to filepath, replacing any existing contents.
+        
+        Args:
+            filepath: Destination file path
+            data: Encoded file contents
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        fd = os.open(filepath, flags, 0o666)
+        try:
+            view = memoryview(data)
+            while view:
+                # os.write may be partial; loop until everything is out
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+    
     def _extract_program_name(self, file_path: str) -> str:
         """Extract program name from file path."""
         if not file_path:
@@ -86,20 +261,34 @@ class DebugLogger:
                                 patch_proposal: Optional[PatchProposal],
                                 success: bool,
                                 llm_response_raw: str = None,
-                                error_message: str = None) -> str:
+                                error_message: str = None,
+                                timestamp: str = None,
+                                program_name: str = None,
+                                local_vars_json: str = None,
+                                fields: dict = None) -> str:
         """Generate markdown content for debug log."""
         
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if program_name is None:
+            program_name = self._extract_program_name(error_context.file_path)
+        if local_vars_json is None:
+            local_vars_json = self._format_local_vars(error_context.local_vars)
+        if fields is None:
+            fields = self._session_fields(
+                error_context, patch_proposal, success, program_name, timestamp
+            )
         
         # Status indicator
         status_indicator = "SUCCESS" if success else "FAILED"
         status_text = "SUCCESS" if success else "FAILED"
         
-        content = f"""# ReflexRuntime Debug Session - {status_indicator}
+        # Collect chunks and join once at the end
+        parts = [format_session_header(fields), f"""# ReflexRuntime Debug Session - {status_indicator}
 
 **Status:** {status_text}  
 **Timestamp:** {timestamp}  
-**Program:** {self._extract_program_name(error_context.file_path)}  
+**Program:** {program_name}  
 **Function:** {error_context.target_fqn}  
 **File:** {error_context.file_path}  
 **Line:** {error_context.line_number}  
@@ -118,7 +307,7 @@ class DebugLogger:
 
 ### Local Variables at Error
 ```json
-{self._format_local_vars(error_context.local_vars)}
+{local_vars_json}
 ```
 
 ---
@@ -133,10 +322,11 @@ class DebugLogger:
 
 ## AI Analysis
 
-"""
+"""]
+        append = parts.append
 
         if patch_proposal:
-            content += f"""
+            append(f"""
 ### AI Recommendation
 **Confidence:** {patch_proposal.confidence:.1%}  
 **Explanation:** {patch_proposal.explanation}
@@ -147,35 +337,34 @@ class DebugLogger:
 ```
 
 ### Test Cases Suggested
-"""
-            for i, test_case in enumerate(patch_proposal.test_cases, 1):
-                content += f"{i}. {test_case}\n"
+""")
+            parts.extend(f"{i}. {test_case}\n" for i, test_case in enumerate(patch_proposal.test_cases, 1))
         else:
-            content += "\n**Result:** AI could not generate a patch for this exception.\n"
+            append("\n**Result:** AI could not generate a patch for this exception.\n")
         
         if llm_response_raw:
-            content += f"""
+            append(f"""
 ### Raw LLM Response
 ```json
 {llm_response_raw}
 ```
-"""
+""")
 
-        content += "\n---\n\n## Patch Application\n\n"
+        append("\n---\n\n## Patch Application\n\n")
         
         if success:
-            content += "**Patch applied successfully!**\n\n"
-            content += "The function was hot-swapped in memory and is now handling the error case gracefully.\n"
+            append("**Patch applied successfully!**\n\n")
+            append("The function was hot-swapped in memory and is now handling the error case gracefully.\n")
         else:
-            content += "**Patch application failed.**\n\n"
+            append("**Patch application failed.**\n\n")
             if error_message:
-                content += f"**Error:** {error_message}\n\n"
-            content += "The original function remains unchanged.\n"
+                append(f"**Error:** {error_message}\n\n")
+            append("The original function remains unchanged.\n")
         
         ai_confidence = f"{patch_proposal.confidence:.1%}" if patch_proposal else "N/A"
         patch_status = "Applied" if success else "Failed"
         
-        content += f"""
+        append(f"""
 ---
 
 ## Session Summary
@@ -188,48 +377,197 @@ class DebugLogger:
 ---
 
 *Generated by ReflexRuntime Debug Logger*
-"""
+""")
         
-        return content
+        return "".join(parts)
+    
+    def _session_fields(self,
+                        error_context: ErrorContext,
+                        patch_proposal: Optional[PatchProposal],
+                        success: bool,
+                        program_name: str,
+                        timestamp: str) -> dict:
+        """Build the header fields of a session, as they appear in its markdown."""
+        fields = {
+            "status": "SUCCESS" if success else "FAILED",
+            "timestamp": timestamp,
+            "program": program_name,
+            "function": error_context.target_fqn,
+            "exc_type": f"`{error_context.exception_type}`",
+        }
+        if patch_proposal:
+            fields["confidence"] = f"{patch_proposal.confidence:.1%}"
+            fields["explanation"] = patch_proposal.explanation.split('\n', 1)[0].strip()
+        return fields
+    
+    def load_session_index(self) -> dict:
+        """Load the session index, or an empty one if missing or corrupt.
+        
+        The index maps each session filename to its ``mtime`` (ns), ``size``
+        and extracted header ``fields``.
+        """
+        try:
+            path = os.path.join(self.debug_dir, self.SESSION_INDEX_FILENAME)
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def save_session_index(self, index: dict):
+        """Atomically persist the session index."""
+        with _index_lock:
+            _write_json_atomic(os.path.join(self.debug_dir, self.SESSION_INDEX_FILENAME), index)
+    
+    def replace_session_index(self, index: dict, previous: dict):
+        """Persist a rebuilt session index without losing concurrent additions.
+        
+        Args:
+            index: The rebuilt index
+            previous: The index the rebuild started from; entries indexed
+                since it was loaded are kept
+        """
+        with _index_lock:
+            for filename, entry in self.load_session_index().items():
+                if filename not in previous and filename not in index:
+                    index[filename] = entry
+            self.save_session_index(index)
+    
+    def _index_session(self, filename: str, filepath: str, fields: dict):
+        """Add a freshly written session to the session index."""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return
+        
+        with _index_lock:
+            index = self.load_session_index()
+            index[filename] = {"mtime": st.st_mtime_ns, "size": st.st_size, "fields": fields}
+            self.save_session_index(index)
     
     def _format_local_vars(self, local_vars: dict) -> str:
         """Format local variables for display."""
-        if not local_vars:
-            return "{}"
-        
-        import json
+        return format_local_vars(local_vars)
+    
+    def _debug_dir_mtime(self) -> Optional[int]:
+        """Return the debug directory's mtime in ns, or None if it is missing."""
         try:
-            return json.dumps(local_vars, default=str, indent=2)
-        except Exception:
-            # Fallback to string representation
-            return str(local_vars)
+            return os.stat(self.debug_dir).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _listing_is_current(self) -> bool:
+        """Whether the cached session listing still matches the directory."""
+        return self._sessions is not None and self._debug_dir_mtime() == self._sessions_mtime
+    
+    def _add_listed_session(self, filename: str, listing_current: bool):
+        """Insert a session this logger just wrote into the cached listing.
+        
+        Args:
+            filename: Session filename
+            listing_current: Whether the listing was current before the write
+        """
+        with self._sessions_lock:
+            if not listing_current or self._sessions is None:
+                self._sessions = None
+                return
+            pos = bisect.bisect_left(self._sessions, filename)
+            if pos == len(self._sessions) or self._sessions[pos] != filename:
+                self._sessions.insert(pos, filename)
+            self._sessions_mtime = self._debug_dir_mtime()
     
     def list_debug_sessions(self) -> list:
         """List all debug session files."""
-        if not os.path.exists(self.debug_dir):
+        flush_debug_sessions()
+        mtime = self._debug_dir_mtime()
+        if mtime is None:
             return []
         
-        files = [f for f in os.listdir(self.debug_dir) if f.endswith('.md')]
-        files.sort(reverse=True)  # Most recent first
-        return files
+        with self._sessions_lock:
+            if self._sessions is None or mtime != self._sessions_mtime:
+                with os.scandir(self.debug_dir) as entries:
+                    files = [entry.name for entry in entries if entry.name.endswith('.md')]
+                files.sort()
+                self._sessions = files
+                self._sessions_mtime = mtime
+            return self._sessions[::-1]  # Most recent first
     
-    def get_session_stats(self) -> dict:
-        """Get statistics about debug sessions."""
-        files = self.list_debug_sessions()
+    def _load_stats_file(self) -> Optional[dict]:
+        """Load the persisted session counters, or None if missing or corrupt."""
+        try:
+            path = os.path.join(self.debug_dir, self.STATS_FILENAME)
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            if isinstance(stats.get("total"), int) and isinstance(stats.get("success"), int):
+                return stats
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+    
+    def _save_stats_file(self, stats: dict):
+        """Atomically persist the session counters."""
+        _write_json_atomic(os.path.join(self.debug_dir, self.STATS_FILENAME), stats)
+    
+    def _record_session_stats(self, success: bool):
+        """Count a newly logged session in the cached and persisted counters."""
+        with self._stats_lock:
+            stats = self._stats if self._stats is not None else self._load_stats_file()
+            if stats is None:
+                # Nothing to update yet; the next stats query rescans
+                return
+            stats["total"] += 1
+            if success:
+                stats["success"] += 1
+            self._stats = stats
+            self._save_stats_file(stats)
+    
+    def _scan_session_stats(self, files: list) -> dict:
+        """Count sessions from their header lines.
         
-        total_sessions = len(files)
+        Reports written before header lines existed are searched in full,
+        through a read-only memory map rather than a copy of the file.
+        """
         successful_sessions = 0
         
         for filename in files:
             filepath = os.path.join(self.debug_dir, filename)
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if "**Status:** SUCCESS" in content:
-                        successful_sessions += 1
+                with open(filepath, 'rb') as f:
+                    first_line = f.readline(SESSION_HEADER_MAX_BYTES)
+                    header = parse_session_header(first_line)
+                    if header is not None:
+                        success = header.get("status") == "SUCCESS"
+                    elif not first_line:
+                        # Empty file; mmap cannot map zero bytes
+                        success = False
+                    else:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            success = mm.find(b"**Status:** SUCCESS") != -1
+                if success:
+                    successful_sessions += 1
             except Exception:
                 continue
         
+        return {"total": len(files), "success": successful_sessions}
+    
+    def get_session_stats(self) -> dict:
+        """Get statistics about debug sessions.
+        
+        Served from running counters; the session files are only read when
+        the counters are missing or disagree with the number of sessions.
+        """
+        files = self.list_debug_sessions()
+        
+        with self._stats_lock:
+            stats = self._stats if self._stats is not None else self._load_stats_file()
+            if stats is None or stats["total"] != len(files):
+                stats = self._scan_session_stats(files)
+                self._save_stats_file(stats)
+            self._stats = stats
+        
+        total_sessions = stats["total"]
+        successful_sessions = stats["success"]
+        
         return {
             "total_sessions": total_sessions,
             "successful_sessions": successful_sessions,
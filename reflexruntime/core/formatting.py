@@ -0,0 +1,154 @@
+"""
+Shared formatting helpers for ReflexRuntime reports and prompts.
+"""
+
+import sys
+import json
+import reprlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_indented(obj) -> str:
+    """Serialize obj as 2-space indented JSON, stringifying unknown types.
+
+    Uses orjson when it is installed and falls back to the standard
+    library for anything orjson rejects (e.g. integers over 64 bits).
+
+    Args:
+        obj: Object to serialize
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, default=str, indent=2)
+
+
+# Bounds for values embedded in prompts and reports
+MAX_STRING_CHARS = 200
+MAX_ITEMS = 10
+MAX_DEPTH = 3
+MAX_TRACEBACK_CHARS = 4000
+# Values larger than this (per sys.getsizeof) are summarized, never repr'd
+MAX_VALUE_BYTES = 64 * 1024
+TRUNCATED_MARKER = "…<truncated>"
+
+_bounded_repr = reprlib.Repr()
+_bounded_repr.maxstring = MAX_STRING_CHARS
+_bounded_repr.maxother = MAX_STRING_CHARS
+_bounded_repr.maxlist = _bounded_repr.maxtuple = MAX_ITEMS
+_bounded_repr.maxdict = _bounded_repr.maxset = _bounded_repr.maxfrozenset = MAX_ITEMS
+
+
+def bounded_repr(value) -> str:
+    """Return a size-capped repr of value that never raises.
+    
+    Args:
+        value: Object to describe
+    """
+    type_name = type(value).__name__
+    # reprlib bounds builtin containers and strings itself; anything else
+    # has its full repr() built first, so oversized objects are skipped
+    if not hasattr(_bounded_repr, 'repr_' + '_'.join(type_name.split())):
+        try:
+            size = sys.getsizeof(value)
+        except Exception:
+            size = 0
+        if size > MAX_VALUE_BYTES:
+            return f"<{type_name} object, {size} bytes>"
+    try:
+        return _bounded_repr.repr(value)
+    except Exception as e:
+        return f"<{type_name} object, repr failed: {type(e).__name__}>"
+
+
+def _shrink_text(text: str) -> str:
+    if len(text) <= MAX_STRING_CHARS:
+        return text
+    return f"{text[:MAX_STRING_CHARS]}{TRUNCATED_MARKER} (len={len(text)})"
+
+
+def shrink(value, depth: int = 0):
+    """Return a JSON-friendly copy of value with a bounded size.
+
+    Long strings are clipped, lists and dicts keep their first items and
+    other objects become a clipped ``str()``. Anything cut short carries
+    TRUNCATED_MARKER so a reader (or the LLM) knows it is partial.
+
+    Args:
+        value: Value to shrink
+        depth: Current nesting depth
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return _shrink_text(value)
+    if depth < MAX_DEPTH and isinstance(value, (list, tuple)):
+        items = [shrink(item, depth + 1) for item in value[:MAX_ITEMS]]
+        if len(value) > MAX_ITEMS:
+            items.append(f"{TRUNCATED_MARKER} ({len(value)} items)")
+        return items
+    if depth < MAX_DEPTH and isinstance(value, dict):
+        shrunk = {}
+        for i, (key, item) in enumerate(value.items()):
+            if i == MAX_ITEMS:
+                shrunk[TRUNCATED_MARKER] = f"{len(value)} items"
+                break
+            shrunk[str(key)] = shrink(item, depth + 1)
+        return shrunk
+    if isinstance(value, (list, tuple, dict, set, frozenset)):
+        return _bounded_repr.repr(value)
+    try:
+        return _shrink_text(str(value))
+    except Exception:
+        return _bounded_repr.repr(value)
+
+
+def shrink_locals(local_vars: dict) -> dict:
+    """Shrink every value of a frame's locals, keeping all of the names.
+
+    Args:
+        local_vars: Mapping of variable names to values
+    """
+    return {str(name): shrink(value, 1) for name, value in local_vars.items()}
+
+
+def format_local_vars(local_vars: dict) -> str:
+    """Render a frame's locals as bounded, indented JSON.
+    
+    The orchestrator renders each exception's locals once with this and
+    hands the string to both the LLM prompt and the session report.
+    
+    Args:
+        local_vars: Mapping of variable names to values
+    """
+    if not local_vars:
+        return "{}"
+    try:
+        return dumps_indented(shrink_locals(local_vars))
+    except Exception:
+        # Fallback to string representation
+        return str(local_vars)
+
+
+def truncate_middle(text: str, max_chars: int = MAX_TRACEBACK_CHARS) -> str:
+    """Clip text to max_chars, keeping its start and its end.
+
+    Tracebacks carry the outermost frames first and the exception last,
+    so both ends are kept and the middle is dropped.
+
+    Args:
+        text: Text to clip
+        max_chars: Maximum number of characters to keep
+    """
+    if len(text) <= max_chars:
+        return text
+    half = max_chars // 2
+    return f"{text[:half]}\n{TRUNCATED_MARKER} ({len(text) - 2 * half} chars)\n{text[-half:]}"
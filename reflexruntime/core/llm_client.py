@@ -3,51 +3,156 @@ LLM client for analyzing exceptions and generating code patches.
 """
 
 import os
+import re
 import json
+import hashlib
 import logging
+import threading
 from typing import Optional
 from dotenv import load_dotenv
 from openai import OpenAI
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when h2 is installed)
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
 from .schemas import ErrorContext, PatchProposal
+from .formatting import format_local_vars, truncate_middle
 
 # Load environment variables from .env file
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+# Memory addresses vary between runs of the same failure
+_ADDRESS_RE = re.compile(r'0x[0-9a-fA-F]+')
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Connection pool shared by every request of the client
+HTTP_TIMEOUT = 30.0
+MAX_KEEPALIVE_CONNECTIONS = 8
+MAX_CONNECTIONS = 16
+
+
+def _create_http_client():
+    """Build a pooled keep-alive httpx client, or None for the SDK default."""
+    if httpx is None:
+        return None
+    return httpx.Client(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=MAX_CONNECTIONS,
+        ),
+        timeout=HTTP_TIMEOUT,
+    )
+
+
+def _decode_json_object(text: str):
+    """Decode the first JSON object in text, ignoring anything around it.
+    
+    Models often wrap the object in a ```json fence or add a sentence
+    before it; decoding from the first brace handles both in one pass.
+    
+    Raises:
+        ValueError: If text contains no decodable JSON object
+    """
+    start = text.find('{')
+    if start < 0:
+        raise ValueError("No JSON object in LLM response")
+    obj, _ = _JSON_DECODER.raw_decode(text, start)
+    return obj
+
+
+def _proposal_from_json(data) -> PatchProposal:
+    """Build a PatchProposal from decoded, untrusted JSON, checking every field.
+    
+    PatchProposal is a plain dataclass, so malformed values must be caught
+    here rather than in the logger, the report or ast.parse.
+    
+    Raises:
+        ValueError: If data is not an object or a field has the wrong type
+    """
+    if not isinstance(data, dict):
+        raise ValueError("LLM response is not a JSON object")
+    patch_code = data.get('patch_code', '')
+    explanation = data.get('explanation', '')
+    if not isinstance(patch_code, str) or not isinstance(explanation, str):
+        raise ValueError("patch_code and explanation must be strings")
+    confidence = data.get('confidence', 0.5)
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float, str)):
+        raise ValueError(f"Invalid confidence: {confidence!r}")
+    test_cases = data.get('test_cases', ())
+    if isinstance(test_cases, str):
+        # A lone test case instead of a list of them
+        test_cases = (test_cases,)
+    if (not isinstance(test_cases, (list, tuple))
+            or not all(isinstance(case, str) for case in test_cases)):
+        raise ValueError("test_cases must be a list of strings")
+    return PatchProposal(
+        patch_code=patch_code,
+        explanation=explanation,
+        confidence=float(confidence),
+        test_cases=tuple(test_cases)
+    )
+
 
 class LLMClient:
     """Client for interacting with LLM APIs to analyze exceptions and generate patches."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Upper bound on cached patch proposals; the oldest are dropped first
+    MAX_CACHED_PATCHES = 256
+    
+    def __init__(self, api_key: Optional[str] = None, cache_path: Optional[str] = None):
         """Initialize the LLM client.
         
         Args:
             api_key: OpenAI API key. If not provided, will look for OPENAI_API_KEY in environment.
+            cache_path: JSON file persisting patch proposals across runs. Defaults to
+                debug/patch_cache.json.
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable or pass api_key parameter.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, http_client=_create_http_client())
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4')  # Using GPT-4 by default for better code analysis
+        
+        self.cache_path = cache_path or os.path.join("debug", "patch_cache.json")
+        self._cache_lock = threading.Lock()
+        self._patch_cache = self._load_patch_cache()
     
-    def analyze_exception_and_generate_patch_with_raw(self, error_context: ErrorContext) -> Optional[tuple]:
+    def analyze_exception_and_generate_patch_with_raw(self, error_context: ErrorContext,
+                                                      local_vars_json: Optional[str] = None) -> Optional[tuple]:
         """Analyze an exception and generate a code patch, returning both proposal and raw response.
         
         Args:
             error_context: Context information about the exception
+            local_vars_json: Pre-rendered local variables, if already formatted
             
         Returns:
             Tuple of (PatchProposal, raw_response) or None if LLM couldn't generate a fix
         """
+        cache_key = self.failure_key(error_context)
+        cached = self._get_cached_patch(cache_key)
+        if cached is not None:
+            log.debug("Using cached LLM patch for %s", error_context.target_fqn)
+            return cached
+        
         try:
-            prompt = self._create_analysis_prompt(error_context)
+            prompt = self._create_analysis_prompt(error_context, local_vars_json)
             
-            print(f"DEBUG: Sending to LLM:")
-            print(f"DEBUG: Model: {self.model}")
-            print(f"DEBUG: Prompt length: {len(prompt)} characters")
-            print(f"DEBUG: Prompt preview: {prompt[:200]}...")
+            log.debug("Sending to LLM:")
+            log.debug("Model: %s", self.model)
+            log.debug("Prompt length: %d characters", len(prompt))
+            log.debug("Prompt preview: %.200s...", prompt)
             
-            response = self.client.chat.completions.create(
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -60,53 +165,76 @@ class LLMClient:
                     }
                 ],
                 temperature=0.1,  # Low temperature for consistent, reliable output
-                max_tokens=1000
+                max_tokens=1000,
+                stream=True
             )
             
-            response_text = response.choices[0].message.content.strip()
+            response_text = self._read_streamed_json(stream)
             
-            print(f"DEBUG: LLM Response received:")
-            print(f"DEBUG: Response length: {len(response_text)} characters")
-            print(f"DEBUG: Full response:")
-            print(f"DEBUG: {response_text}")
+            log.debug("LLM Response received:")
+            log.debug("Response length: %d characters", len(response_text))
+            log.debug("Full response:\n%s", response_text)
             
-            # Parse the JSON response
+            # Parse the first JSON object, with or without markdown around it
             try:
-                patch_data = json.loads(response_text)
-                proposal = PatchProposal(
-                    patch_code=patch_data.get('patch_code', ''),
-                    explanation=patch_data.get('explanation', ''),
-                    confidence=float(patch_data.get('confidence', 0.5)),
-                    test_cases=patch_data.get('test_cases', [])
-                )
-                return (proposal, response_text)
-            except json.JSONDecodeError:
-                print(f"ERROR: LLM returned invalid JSON: {response_text}")
-                # Try to extract JSON from response if it's wrapped in markdown
-                try:
-                    import re
-                    json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-                    if json_match:
-                        patch_data = json.loads(json_match.group(1))
-                        proposal = PatchProposal(
-                            patch_code=patch_data.get('patch_code', ''),
-                            explanation=patch_data.get('explanation', ''),
-                            confidence=float(patch_data.get('confidence', 0.5)),
-                            test_cases=patch_data.get('test_cases', [])
-                        )
-                        return (proposal, response_text)
-                    else:
-                        print(f"ERROR: Could not extract valid JSON from LLM response")
-                        return None
-                except (json.JSONDecodeError, AttributeError):
-                    print(f"ERROR: Failed to parse LLM response as JSON")
-                    return None
+                proposal = _proposal_from_json(_decode_json_object(response_text))
+            except ValueError:
+                print(f"ERROR: Could not extract valid JSON from LLM response: {response_text}")
+                return None
+            self._cache_patch(cache_key, proposal, response_text)
+            return (proposal, response_text)
                 
         except Exception as e:
             print(f"ERROR: LLM API error: {e}")
             # Return None to allow fallback behavior
             return None
 
+    def _read_streamed_json(self, stream) -> str:
+        """Accumulate a streamed completion until its outer JSON object closes.
+        
+        Tracks brace depth (ignoring braces inside JSON strings) so the
+        stream can be closed as soon as the response object is complete,
+        instead of waiting for the model to finish generating.
+        
+        Args:
+            stream: Iterable of chat completion chunks
+        """
+        parts = []
+        depth = 0
+        started = in_string = escaped = False
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                parts.append(text)
+                for ch in text:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif ch == '\\':
+                            escaped = True
+                        elif ch == '"':
+                            in_string = False
+                    elif ch == '"':
+                        in_string = started
+                    elif ch == '{':
+                        depth += 1
+                        started = True
+                    elif ch == '}' and started:
+                        depth -= 1
+                        if depth == 0:
+                            break
+                if started and depth == 0:
+                    break
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+        return "".join(parts).strip()
+
     def analyze_exception_and_generate_patch(self, error_context: ErrorContext) -> Optional[PatchProposal]:
         """Analyze an exception and generate a code patch to fix it (backward compatibility).
         
@@ -121,9 +249,99 @@ class LLMClient:
             return result[0]  # Return just the proposal
         return None
     
-    def _create_analysis_prompt(self, error_context: ErrorContext) -> str:
+    def failure_key(self, error_context: ErrorContext) -> str:
+        """Content hash identifying a recurring failure of the same code.
+        
+        Keys both the patch cache and the orchestrator's known-good patches.
+        """
+        message = _ADDRESS_RE.sub('0x?', error_context.exception_message)
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (error_context.exception_type, error_context.target_fqn,
+                     error_context.source_code, message):
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def _load_patch_cache(self) -> dict:
+        """Load persisted patch proposals, or an empty cache if missing or corrupt."""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_patch_cache(self):
+        """Atomically persist the patch cache. Caller holds the cache lock."""
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._patch_cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"WARNING: Failed to save patch cache: {e}")
+    
+    def _get_cached_patch(self, cache_key: str) -> Optional[tuple]:
+        """Return a cached (PatchProposal, raw_response) pair, if any."""
+        with self._cache_lock:
+            entry = self._patch_cache.get(cache_key)
+        if not entry:
+            return None
+        try:
+            return (_proposal_from_json(entry), entry['raw'])
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    def _cache_patch(self, cache_key: str, proposal: PatchProposal, raw_response: str):
+        """Remember a parsed LLM proposal and persist it."""
+        with self._cache_lock:
+            self._patch_cache.pop(cache_key, None)
+            self._patch_cache[cache_key] = {
+                'patch_code': proposal.patch_code,
+                'explanation': proposal.explanation,
+                'confidence': proposal.confidence,
+                'test_cases': list(proposal.test_cases),
+                'raw': raw_response,
+            }
+            while len(self._patch_cache) > self.MAX_CACHED_PATCHES:
+                del self._patch_cache[next(iter(self._patch_cache))]
+            self._save_patch_cache()
+    
+    def invalidate_cached_patch(self, error_context: ErrorContext):
+        """Drop the cached proposal for this failure, e.g. after it failed to apply.
+        
+        Args:
+            error_context: Context of the failure whose proposal should be forgotten
+        """
+        with self._cache_lock:
+            if self._patch_cache.pop(self.failure_key(error_context), None) is not None:
+                self._save_patch_cache()
+    
+    def _create_analysis_prompt(self, error_context: ErrorContext,
+                                local_vars_json: Optional[str] = None) -> str:
         """Create a prompt for the LLM to analyze the exception and generate a patch."""
-        prompt = f"""
+        if local_vars_json is None:
+            local_vars_json = format_local_vars(error_context.local_vars)
+        return "".join((
+            _PROMPT_HEAD,
+            "- Exception Type: ", error_context.exception_type,
+            "\n- Exception Message: ", error_context.exception_message,
+            "\n- Failed Function: ", error_context.target_fqn,
+            "\n- Error Location: Line ", str(error_context.line_number),
+            "\n\n**Original Function Source Code:**\n```python\n", error_context.source_code,
+            "\n```\n\n**Full Traceback:**\n```\n", truncate_middle(error_context.traceback_str),
+            "\n```\n\n**Local Variables at Time of Error:**\n",
+            local_vars_json,
+            _PROMPT_TASK,
+            error_context.exception_type,
+            _JSON_SCHEMA_HINT,
+        ))
+
+
+# Static parts of the analysis prompt; only the exception details between
+# them change from one failure to the next
+_PROMPT_HEAD = """
 You are ReflexRuntime, an AI system that automatically fixes Python code at runtime. A Python function has thrown an exception and you need to generate a replacement function that handles this error gracefully.
 
 **CRITICAL REQUIREMENTS:**
@@ -134,23 +352,9 @@ You are ReflexRuntime, an AI system that automatically fixes Python code at runt
 5. Include a docstring mentioning this is AI-patched
 
 **Exception Analysis:**
-- Exception Type: {error_context.exception_type}
-- Exception Message: {error_context.exception_message}
-- Failed Function: {error_context.target_fqn}
-- Error Location: Line {error_context.line_number}
-
-**Original Function Source Code:**
-```python
-{error_context.source_code}
-```
-
-**Full Traceback:**
-```
-{error_context.traceback_str}
-```
+"""
 
-**Local Variables at Time of Error:**
-{json.dumps(error_context.local_vars, default=str, indent=2)}
+_PROMPT_TASK = """
 
 **Your Task:**
 Analyze this exception and create a patched version of the function that:
@@ -160,25 +364,31 @@ Analyze this exception and create a patched version of the function that:
 - Includes appropriate error messaging
 
 **Required JSON Response Format:**
-{{
-    "patch_code": "def exact_function_name(same, parameters):\\n    \\\"\\\"\\\"AI-patched function that handles {error_context.exception_type}.\\\"\\\"\\\"\\n    # Add your error handling logic here\\n    # Return appropriate values for both error and normal cases",
+{
+    "patch_code": "def exact_function_name(same, parameters):\\n    \\\"\\\"\\\"AI-patched function that handles """
+
+# Continues the patch_code example above, right after the exception type
+_JSON_SCHEMA_HINT = """.\\\"\\\"\\\"\\n    # Add your error handling logic here\\n    # Return appropriate values for both error and normal cases",
     "explanation": "Concise explanation of what was fixed and how the error is now handled",
     "confidence": 0.85,
     "test_cases": ["describe a test case that would trigger the original error", "describe a test case that should work normally"]
-}}
+}
 
 Respond with ONLY the JSON - no additional text:
 """
-        return prompt
 
 
 # Global LLM client instance
 _global_llm_client = None
+_global_llm_client_lock = threading.Lock()
 
 
 def get_llm_client() -> LLMClient:
     """Get or create the global LLM client instance."""
     global _global_llm_client
     if _global_llm_client is None:
-        _global_llm_client = LLMClient()
+        # Concurrent first failures must not each open their own connection pool
+        with _global_llm_client_lock:
+            if _global_llm_client is None:
+                _global_llm_client = LLMClient()
     return _global_llm_client 
\ No newline at end of file
@@ -3,56 +3,102 @@ Main orchestrator for exception handling and patch coordination.
 """
 
 import sys
+import ast
 import uuid
+import types
+import hashlib
+import importlib
+import logging
+import logging.handlers
 import traceback
-import re
 from datetime import datetime
 from .llm_client import get_llm_client
 from .debug_logger import get_debug_logger
 from .schemas import ErrorContext, PatchProposal
+from .formatting import format_local_vars
+
+log = logging.getLogger(__name__)
+
+# Debug records are held in memory and written out in one go at the end of
+# each handled exception (or as soon as this many records pile up)
+DEBUG_BUFFER_RECORDS = 1024
+
+_debug_buffer = None
+
+
+def _patch_key(patch_code: str) -> bytes:
+    """Hash of a patch's source, keying its compiled form."""
+    return hashlib.blake2b(patch_code.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def _failing_function_name(tb) -> str:
+    """Name of the function running in the innermost frame of a traceback."""
+    if tb is None:
+        return ""
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return tb.tb_frame.f_code.co_name
 
 
 class SimpleOrchestrator:
     """Simplified orchestrator for Phase 1 demo with detailed debugging."""
     
-    def __init__(self):
+    def __init__(self, debug=True):
         self._active_patches = {}
+        self._ns_cache = {}
+        # Compiled patch code keyed by a hash of its source
+        self._compiled_patches = {}
+        # LLM client failure key -> (PatchProposal, raw response) of patches
+        # that applied successfully
+        self._known_good_patches = {}
         self.patches_applied = 0
-        self.debug = True
+        self.debug = debug
+    
+    @property
+    def debug(self) -> bool:
+        """Whether debug records are logged; setting it reconfigures logging."""
+        return self._debug
+    
+    @debug.setter
+    def debug(self, debug: bool):
+        self._debug = debug
+        configure_debug_logging(debug)
     
     def handle(self, exc_type, exc_value, tb) -> bool:
         """Handle an exception by applying a simple fix."""
+        ctx = None
         try:
-            if self.debug:
-                print(f"\nDEBUG: Exception handler triggered")
-                print(f"DEBUG: Exception type: {exc_type.__name__}")
-                print(f"DEBUG: Exception message: {str(exc_value)}")
-                print(f"DEBUG: Traceback:")
-                traceback.print_tb(tb)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Exception handler triggered")
+                log.debug("Exception type: %s", exc_type.__name__)
+                log.debug("Exception message: %s", exc_value)
+                log.debug("Traceback:\n%s", "".join(traceback.format_tb(tb)).rstrip())
             
-            # Create error context
-            ctx = ErrorContext.from_traceback(exc_type, exc_value, tb)
-            
-            if self.debug:
-                print(f"DEBUG: Error context created")
-                print(f"DEBUG: Target FQN: {ctx.target_fqn}")
-                print(f"DEBUG: File path: {ctx.file_path}")
-                print(f"DEBUG: Line number: {ctx.line_number}")
-                print(f"DEBUG: Source code preview:")
-                print(f"DEBUG: {ctx.source_code[:200]}...")
+            # Create error context; its source and locals are filled in on a
+            # background thread while the LLM client is fetched
+            ctx = ErrorContext.capture_cheap(exc_type, exc_value, tb)
             
             print(f"ReflexRuntime: Analyzing {ctx.exception_type}")
             print(f"Sending exception to LLM for analysis...")
             
-            if self.debug:
-                print(f"DEBUG: Full error context:")
-                print(f"DEBUG: Exception type: {ctx.exception_type}")
-                print(f"DEBUG: Exception message: {ctx.exception_message}")
-                print(f"DEBUG: Target function: {ctx.target_fqn}")
-                print(f"DEBUG: Source code length: {len(ctx.source_code)} chars")
-            
             # Get LLM client and analyze
             llm_client = get_llm_client()
+            ctx.ready()
+            # Rendered once for both the LLM prompt and the session report
+            local_vars_json = format_local_vars(ctx.local_vars)
+            
+            log.debug("Error context created")
+            log.debug("Target FQN: %s", ctx.target_fqn)
+            log.debug("File path: %s", ctx.file_path)
+            log.debug("Line number: %s", ctx.line_number)
+            log.debug("Source code preview:\n%.200s...", ctx.source_code)
+            
+            log.debug("Full error context:")
+            log.debug("Exception type: %s", ctx.exception_type)
+            log.debug("Exception message: %s", ctx.exception_message)
+            log.debug("Target function: %s", ctx.target_fqn)
+            log.debug("Source code length: %d chars", len(ctx.source_code))
+            
             if llm_client is None:
                 print(f"ERROR: LLM client not available - cannot analyze {ctx.exception_type}")
                 error_message = "LLM client not available"
@@ -61,8 +107,21 @@ class SimpleOrchestrator:
                 llm_response_raw = None
             else:
                 try:
-                    # Call LLM to analyze and generate patch
-                    response_data = llm_client.analyze_exception_and_generate_patch_with_raw(ctx)
+                    # Keyed by content, including the message, since different
+                    # functions can fail through the same catching frame
+                    known_key = llm_client.failure_key(ctx)
+                    response_data = self._known_good_patches.get(known_key)
+                    if (response_data is not None
+                            and not self._patch_defines(response_data[0], _failing_function_name(tb))):
+                        response_data = None
+                    if response_data is not None:
+                        # The same failure was already fixed once; skip the LLM
+                        log.debug("Reusing known-good patch for %s", ctx.target_fqn)
+                    else:
+                        # Call LLM to analyze and generate patch
+                        response_data = llm_client.analyze_exception_and_generate_patch_with_raw(
+                            ctx, local_vars_json=local_vars_json
+                        )
                     
                     if response_data:
                         patch_proposal, llm_response_raw = response_data
@@ -79,9 +138,7 @@ class SimpleOrchestrator:
                         print(f"LLM Explanation: {patch_proposal.explanation}")
                         print(f"LLM Confidence: {patch_proposal.confidence:.1%}")
                         
-                        if self.debug:
-                            print(f"DEBUG: Generated patch code:")
-                            print(f"DEBUG: {patch_proposal.patch_code}")
+                        log.debug("Generated patch code:\n%s", patch_proposal.patch_code)
                         
                         # Apply the LLM-generated patch
                         success = self._apply_llm_patch(ctx, patch_proposal)
@@ -90,11 +147,14 @@ class SimpleOrchestrator:
                             print(f"SUCCESS: LLM patch applied successfully! Function is now self-healing.")
                             self.patches_applied += 1
                             error_message = None  # No error
+                            self._known_good_patches[known_key] = (patch_proposal, llm_response_raw)
                         else:
-                            if self.debug:
-                                print("DEBUG: LLM patch application failed")
+                            log.debug("LLM patch application failed")
                             print("FAILED: Failed to apply LLM patch")
                             error_message = "Patch application failed"
+                            # Don't serve this proposal again for the same failure
+                            self._known_good_patches.pop(known_key, None)
+                            llm_client.invalidate_cached_patch(ctx)
                     
                     # Log the session regardless of success/failure
                     debug_logger = get_debug_logger()
@@ -103,15 +163,15 @@ class SimpleOrchestrator:
                         patch_proposal=patch_proposal,
                         success=success,
                         llm_response_raw=llm_response_raw,
-                        error_message=error_message
+                        error_message=error_message,
+                        local_vars_json=local_vars_json
                     )
                     
                     return success
                         
                 except Exception as llm_error:
                     print(f"ERROR: LLM integration error: {llm_error}")
-                    if self.debug:
-                        traceback.print_exc()
+                    log.debug("LLM integration error", exc_info=True)
                     print(f"FAILED: No fallback available - LLM integration required")
                     success = False
                     error_message = f"LLM integration error: {llm_error}"
@@ -124,7 +184,8 @@ class SimpleOrchestrator:
                             patch_proposal=None,
                             success=False,
                             llm_response_raw=None,
-                            error_message=error_message
+                            error_message=error_message,
+                            local_vars_json=local_vars_json
                         )
                     except Exception as log_error:
                         print(f"WARNING: Failed to log debug session: {log_error}")
@@ -132,25 +193,53 @@ class SimpleOrchestrator:
                     return False
                     
         except Exception as e:
-            if self.debug:
-                print(f"DEBUG: Internal ReflexRuntime error: {e}")
-                traceback.print_exc()
+            log.debug("Internal ReflexRuntime error: %s", e, exc_info=True)
             return False
+        finally:
+            if ctx is not None:
+                # Everything above has rendered what it needs from the context
+                ErrorContext.release(ctx)
+            flush_debug_log()
     
     def _apply_llm_patch(self, error_context: ErrorContext, patch_proposal) -> bool:
         """Apply LLM-generated patch to the original function."""
         try:
-            if self.debug:
-                print(f"DEBUG: Applying LLM patch for {error_context.target_fqn}")
+            log.debug("Applying LLM patch for %s", error_context.target_fqn)
+            
+            target_name = error_context.target_fqn.rsplit('.', 1)[-1]
+            patch_key = _patch_key(patch_proposal.patch_code)
+            compiled = self._compiled_patches.get(patch_key)
+            if compiled is None:
+                # Parse the patch once; the tree yields the function names and
+                # is compiled directly, and both are kept for re-application
+                try:
+                    tree = ast.parse(patch_proposal.patch_code)
+                except SyntaxError as parse_error:
+                    print(f"ERROR: LLM patch is not valid Python: {parse_error}")
+                    return False
+                
+                func_names = [node.name for node in tree.body
+                              if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
+                try:
+                    code = compile(
+                        tree,
+                        f"<reflex-patch {self._extract_function_name(func_names, target_name)}>",
+                        "exec"
+                    )
+                except (SyntaxError, ValueError) as compile_error:
+                    print(f"ERROR: Error compiling LLM patch: {compile_error}")
+                    return False
+                compiled = self._compiled_patches[patch_key] = (func_names, code)
+            
+            func_names, code = compiled
             
             # Extract function name from the patch
-            func_name = self._extract_function_name(patch_proposal.patch_code)
+            func_name = self._extract_function_name(func_names, target_name)
             if not func_name:
                 print("ERROR: Could not extract function name from LLM patch")
                 return False
             
-            if self.debug:
-                print(f"DEBUG: Extracted function name: {func_name}")
+            log.debug("Extracted function name: %s", func_name)
             
             # Get the target namespace where the function lives
             namespace = self._get_function_namespace(error_context.target_fqn)
@@ -163,76 +252,124 @@ class SimpleOrchestrator:
                 print(f"ERROR: Function '{func_name}' not found in target namespace")
                 return False
             
-            if self.debug:
-                original_func = getattr(namespace, func_name)
-                print(f"DEBUG: Original function: {original_func}")
+            original_func = getattr(namespace, func_name)
+            log.debug("Original function: %s", original_func)
+            
+            # Re-applying the active patch only needs the function rebound
+            active = self._active_patches.get(error_context.target_fqn)
+            if (active is not None and active[0] == patch_key and active[1] == func_name
+                    and getattr(active[2], '__globals__', None) is namespace.__dict__):
+                setattr(namespace, func_name, active[2])
+                log.debug("Re-applied active patch: %s", active[2])
+                return True
             
-            # Execute the patch code in the namespace
+            # Execute the patch with the module's globals but its own locals,
+            # so the new function can be inspected before anything is rebound
+            patch_ns = {}
             try:
-                exec(patch_proposal.patch_code, namespace.__dict__)
+                exec(code, namespace.__dict__, patch_ns)
             except Exception as exec_error:
                 # Check if the function was created despite the error
-                if hasattr(namespace, func_name):
-                    if self.debug:
-                        print(f"DEBUG: Function created despite execution error: {exec_error}")
+                if func_name in patch_ns:
+                    log.debug("Function created despite execution error: %s", exec_error)
                 else:
                     print(f"ERROR: LLM patch did not create function '{func_name}'")
                     return False
-            except SyntaxError as exec_error:
-                print(f"ERROR: Error executing LLM patch: {exec_error}")
-                return False
             
-            # Verify the patch was applied
-            new_func = getattr(namespace, func_name, None)
-            if new_func is None:
+            patched_func = patch_ns.pop(func_name, None)
+            if patched_func is None:
                 print(f"ERROR: Function '{func_name}' not found after patch application")
                 return False
             
-            if self.debug:
-                print(f"DEBUG: Function hot-swapped successfully")
-                print(f"DEBUG: New function: {getattr(namespace, func_name)}")
+            # Helpers and imports the patch defines at top level are module globals
+            namespace.__dict__.update(patch_ns)
+            
+            if self._swap_function_code(original_func, patched_func):
+                new_func = original_func
+                log.debug("Function code swapped in place")
+            else:
+                new_func = patched_func
+                setattr(namespace, func_name, new_func)
+                log.debug("Function hot-swapped successfully")
+            log.debug("New function: %s", new_func)
             
+            self._active_patches[error_context.target_fqn] = (patch_key, func_name, new_func)
             return True
             
-        except Exception as e:
-            if self.debug:
-                traceback.print_exc()
+        except Exception:
+            log.debug("Failed to apply LLM patch", exc_info=True)
             return False
     
-    def _extract_function_name(self, patch_code):
-        """Extract the function name from patch code."""
+    def _swap_function_code(self, original_func, patched_func) -> bool:
+        """Give original_func the code of patched_func, in place.
+        
+        Every existing reference to the original (other modules' imports,
+        callbacks, decorators' registries) then runs the patch. Returns False
+        when the swap is impossible, e.g. for builtins or when the closure
+        layouts differ, so the caller can rebind the name instead.
+        
+        Args:
+            original_func: Function currently bound in the target namespace
+            patched_func: Function defined by the patch
+        """
+        if not (isinstance(original_func, types.FunctionType)
+                and isinstance(patched_func, types.FunctionType)):
+            return False
         try:
-            # Look for function definition using regex
-            match = re.search(r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(', patch_code)
-            if match:
-                return match.group(1)
-            return None
-        except Exception:
-            return None
+            original_func.__code__ = patched_func.__code__
+        except ValueError:
+            # Code with a different number of free variables
+            return False
+        original_func.__defaults__ = patched_func.__defaults__
+        original_func.__kwdefaults__ = patched_func.__kwdefaults__
+        original_func.__doc__ = patched_func.__doc__
+        return True
+    
+    def _patch_defines(self, patch_proposal, func_name) -> bool:
+        """Whether an already compiled patch defines a function named func_name."""
+        compiled = self._compiled_patches.get(_patch_key(patch_proposal.patch_code))
+        return compiled is not None and func_name in compiled[0]
+    
+    def _extract_function_name(self, names, target_name=None):
+        """Pick the patched function's name from the functions a patch defines.
+        
+        Args:
+            names: Names of the top-level functions defined by the patch
+            target_name: Preferred function name, used when the patch defines it
+        """
+        if target_name in names:
+            return target_name
+        return names[0] if names else None
     
     def _get_function_namespace(self, fqn):
         """Get the namespace where the function is defined based on its FQN."""
+        namespace = self._ns_cache.get(fqn)
+        if namespace is not None:
+            return namespace
+        
         try:
             # Try __main__ first (most common for demo scripts)
-            import __main__
+            main = sys.modules.get('__main__')
             func_name = fqn.split('.')[-1]
-            if hasattr(__main__, func_name):
-                return __main__
-            
-            # Try to find the module from the FQN
-            module_path = fqn.rsplit('.', 1)[0]
-            if module_path != 'unknown':
-                try:
-                    import importlib
-                    module = importlib.import_module(module_path)
-                    return module
-                except ImportError:
-                    pass
-            
-            return __main__  # Fallback to __main__
-            
+            if main is not None and hasattr(main, func_name):
+                namespace = main
+            else:
+                # Already-loaded modules are a dict lookup away; only import on a miss
+                module_path = fqn.rsplit('.', 1)[0]
+                namespace = sys.modules.get(module_path)
+                if namespace is None and module_path != 'unknown':
+                    try:
+                        namespace = importlib.import_module(module_path)
+                    except ImportError:
+                        pass
+                if namespace is None:
+                    namespace = main  # Fallback to __main__
         except Exception:
             return None
+        
+        if namespace is not None:
+            self._ns_cache[fqn] = namespace
+        return namespace
     
 
     def install_hook(self):
@@ -241,19 +378,16 @@ class SimpleOrchestrator:
         orchestrator = self
         
         def reflex_excepthook(exc_type, exc_value, tb):
-            if orchestrator.debug:
-                print(f"\nDEBUG: sys.excepthook called")
-                print(f"DEBUG: Exception: {exc_type.__name__}: {exc_value}")
+            log.debug("sys.excepthook called")
+            log.debug("Exception: %s: %s", exc_type.__name__, exc_value)
             
             # Try to handle the exception
             handled = orchestrator.handle(exc_type, exc_value, tb)
             
             if handled:
-                if orchestrator.debug:
-                    print(f"DEBUG: Exception was handled by ReflexRuntime")
+                log.debug("Exception was handled by ReflexRuntime")
             else:
-                if orchestrator.debug:
-                    print(f"DEBUG: Exception not handled, falling back to default behavior")
+                log.debug("Exception not handled, falling back to default behavior")
                 # Fall back to original exception handling only if not handled
                 original_excepthook(exc_type, exc_value, tb)
         
@@ -284,6 +418,33 @@ def install_autopatch():
     orchestrator.install_hook()
 
 
+def configure_debug_logging(debug=True):
+    """Route ReflexRuntime debug logs to stderr through an in-memory buffer.
+    
+    With debug off the level is raised to WARNING, so debug calls return
+    before formatting their arguments.
+    
+    Args:
+        debug: Whether to emit DEBUG records
+    """
+    global _debug_buffer
+    package_log = logging.getLogger("reflexruntime")
+    package_log.setLevel(logging.DEBUG if debug else logging.WARNING)
+    if _debug_buffer is None:
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        _debug_buffer = logging.handlers.MemoryHandler(
+            DEBUG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=stream_handler
+        )
+        package_log.addHandler(_debug_buffer)
+
+
+def flush_debug_log():
+    """Write out any buffered debug records."""
+    if _debug_buffer is not None:
+        _debug_buffer.flush()
+
+
 def activate_reflex_runtime(debug=True):
     """Activate ReflexRuntime with the specified debug mode."""
     orchestrator = get_orchestrator()
@@ -1,30 +1,119 @@
 """
-Pydantic schemas for ReflexRuntime data structures.
+Schemas for ReflexRuntime data structures.
+
+ErrorContext is a pydantic model; the patch records built internally from
+trusted values are plain dataclasses.
 """
 
+import io
+import os
+import sys
+import queue
+import functools
+import threading
+import linecache
+import traceback as tb_module
 from datetime import datetime
-from enum import Enum
-from typing import Any, Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Final, Literal, Optional, Sequence, Tuple
+from .formatting import bounded_repr
 
 try:
-    from pydantic import BaseModel, Field
+    from pydantic import BaseModel, Field, PrivateAttr
+    _PYDANTIC_AVAILABLE = True
 except ImportError:
-    # Fallback for basic functionality
+    _PYDANTIC_AVAILABLE = False
+    
+    # Fallback for basic functionality. Subclasses list their fields in
+    # __slots__, so instances carry no per-object __dict__.
     class BaseModel:
+        __slots__ = ()
+        
         def __init__(self, **kwargs):
             for k, v in kwargs.items():
                 setattr(self, k, v)
     
     def Field(**kwargs):
         return None
+    
+    def PrivateAttr(default=None, **kwargs):
+        return default
+
+
+# Status of a patch operation. Identifier-like string literals are interned
+# by the compiler, so comparing statuses is a pointer comparison.
+PatchStatus = Literal["pending", "applied", "failed", "rolled_back"]
+
+PENDING: Final = "pending"
+APPLIED: Final = "applied"
+FAILED: Final = "failed"
+ROLLED_BACK: Final = "rolled_back"
+
+
+# Locals whose names start with these are private or dunder and not captured
+_SKIP_LOCAL_PREFIXES = ('_',)
+
+# Set REFLEX_CAPTURE_LOCALS=0 to skip capturing locals by default
+CAPTURE_LOCALS = os.environ.get("REFLEX_CAPTURE_LOCALS", "1") == "1"
+
+
+def _construct(model_cls, values: dict):
+    """Build a model from trusted, locally computed values without validation."""
+    try:
+        return model_cls.model_construct(**values)
+    except AttributeError:
+        pass
+    try:
+        return model_cls.construct(**values)  # pydantic v1
+    except AttributeError:
+        # The fallback BaseModel never validates
+        return model_cls(**values)
+
+
+@functools.lru_cache(maxsize=256)
+def _dedupe(text: str) -> str:
+    """Return the first-seen string equal to text, so repeats share one copy."""
+    return text
+
+
+# Bound once so the exception path does a single global lookup per call
+_getlines = linecache.getlines
+_TracebackException = tb_module.TracebackException
+
+
+# Code object -> target FQN of frames running it; cleared when full
+FQN_CACHE_SIZE = 4096
+_FQN_CACHE = {}
+
+
+# Lines of source shown on each side of the failing line
+SOURCE_CONTEXT_LINES = 2
+
+
+@functools.lru_cache(maxsize=512)
+def _format_source_window(file_path: str, mtime_ns, line_number: int) -> str:
+    """Format the numbered source lines around line_number, marking it with >>>.
+    
+    Cached per file version; mtime_ns is only part of the cache key.
+    """
+    lines = _getlines(file_path)
+    start = max(1, line_number - SOURCE_CONTEXT_LINES)
+    end = min(len(lines), line_number + SOURCE_CONTEXT_LINES)
+    return "\n".join([
+        f"{'>>> ' if i == line_number else '    '}{i}: {lines[i - 1].rstrip()}"
+        for i in range(start, end + 1)
+    ])
 
 
-class PatchStatus(str, Enum):
-    """Status of a patch operation."""
-    PENDING = "pending"
-    APPLIED = "applied"
-    FAILED = "failed"
-    ROLLED_BACK = "rolled_back"
+def _source_window(file_path: str, line_number: int) -> str:
+    """Return the formatted source window, cached while the file is unchanged."""
+    try:
+        mtime_ns = os.stat(file_path).st_mtime_ns
+    except (OSError, ValueError):
+        # Not a real file (e.g. <stdin>); its lines may change, so don't cache
+        return _format_source_window.__wrapped__(file_path, None, line_number)
+    return _format_source_window(file_path, mtime_ns, line_number)
 
 
 class ErrorContext(BaseModel):
@@ -32,20 +121,162 @@ class ErrorContext(BaseModel):
     
     exception_type: str
     exception_message: str
-    traceback_str: str
     target_fqn: str
     source_code: str
     file_path: str
     line_number: int
-    local_vars: Dict[str, Any]
+    # Captured locals as parallel tuples: names and their bounded reprs
+    local_var_names: Tuple[str, ...]
+    local_var_reprs: Tuple[str, ...]
+    
+    # traceback_str is formatted from the exception on first access;
+    # _ready is set once a capture_cheap() context has been enriched
+    if _PYDANTIC_AVAILABLE:
+        _traceback_str: Optional[str] = PrivateAttr(default=None)
+        _exc_info: Optional[tuple] = PrivateAttr(default=None)
+        _ready: Optional[threading.Event] = PrivateAttr(default=None)
+    else:
+        # Slots can't have class-level defaults; __init__ assigns these
+        __slots__ = (
+            "exception_type", "exception_message", "target_fqn", "source_code",
+            "file_path", "line_number", "local_var_names", "local_var_reprs",
+            "_traceback_str", "_exc_info", "_ready",
+        )
+    
+    # Released contexts waiting to be reused by from_traceback and capture_cheap
+    POOL_SIZE: ClassVar[int] = 64
+    _pool: ClassVar[deque] = deque(maxlen=POOL_SIZE)
+    
+    def __init__(self, traceback_str: Optional[str] = None,
+                 local_vars: Optional[Dict[str, str]] = None, **data):
+        if local_vars is not None:
+            data["local_var_names"] = tuple(local_vars)
+            data["local_var_reprs"] = tuple(local_vars.values())
+        super().__init__(**data)
+        self._traceback_str = traceback_str
+        self._exc_info = None
+        self._ready = None
+    
+    @property
+    def local_vars(self) -> Dict[str, str]:
+        """Captured locals as a name -> bounded repr dict, built on each access."""
+        return dict(zip(self.local_var_names, self.local_var_reprs))
+    
+    @property
+    def traceback_str(self) -> str:
+        """Full formatted traceback, built on first access."""
+        return self._format_traceback()
+    
+    def _format_traceback(self) -> str:
+        """Format the kept exception into _traceback_str and return it."""
+        if self._traceback_str is None:
+            exc_info = self._exc_info
+            if exc_info is None:
+                return ""
+            # Stream the formatted chunks into one buffer; source lines are
+            # looked up while formatting rather than while walking the stack
+            exc_type, exc_value, tb = exc_info
+            buffer = io.StringIO()
+            buffer.writelines(_TracebackException(
+                exc_type, exc_value, tb, lookup_lines=False, capture_locals=False
+            ).format())
+            # A recurring failure formats to the same text every time
+            self._traceback_str = _dedupe(buffer.getvalue())
+            # Formatted; the frames no longer need to be kept alive
+            self._exc_info = None
+        return self._traceback_str
+    
+    @traceback_str.setter
+    def traceback_str(self, value: str):
+        self._traceback_str = value
+        self._exc_info = None
     
     @classmethod
-    def from_traceback(cls, exc_type, exc_value, tb) -> 'ErrorContext':
-        """Create ErrorContext from exception traceback info."""
+    def acquire(cls) -> 'ErrorContext':
+        """Take a released context from the pool, or a new blank one.
+        
+        The caller must assign every field; nothing is validated.
+        """
+        try:
+            return cls._pool.pop()
+        except IndexError:
+            return _construct(cls, {})
+    
+    @classmethod
+    def release(cls, ctx: 'ErrorContext'):
+        """Return a context to the pool once nothing uses it anymore.
+        
+        Drops its references to the exception and its locals so pooled
+        contexts don't keep frames alive.
+        
+        Args:
+            ctx: Context that no longer has any users
+        """
+        # Never recycle a context the enrichment thread still writes to
+        ctx.ready()
+        ctx._ready = None
+        ctx._exc_info = None
+        ctx._traceback_str = None
+        ctx.local_var_names = ctx.local_var_reprs = ()
+        cls._pool.append(ctx)
+    
+    @classmethod
+    def _from_trusted(cls, exc_info: Optional[tuple] = None,
+                      traceback_str: Optional[str] = None, **values) -> 'ErrorContext':
+        """Build a context from locally computed field values, skipping validation.
+        
+        Reuses a pooled instance when one is available.
+        """
+        try:
+            ctx = cls._pool.pop()
+        except IndexError:
+            ctx = _construct(cls, values)
+        else:
+            for name, value in values.items():
+                setattr(ctx, name, value)
+        ctx._traceback_str = traceback_str
+        ctx._exc_info = exc_info
+        ctx._ready = None
+        return ctx
+    
+    def ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until source_code, local_vars and traceback_str are filled in.
+        
+        Only contexts from capture_cheap() are enriched in the background;
+        for any other context this returns at once.
+        
+        Args:
+            timeout: Seconds to wait at most; None waits indefinitely
+        """
+        ready = self._ready
+        if ready is None:
+            return True
+        return ready.wait(timeout)
+    
+    def _enrich(self, f_locals: Optional[dict], format_traceback: bool = False):
+        """Fill in the source window and the locals, then mark the context ready.
         
+        Args:
+            f_locals: The failing frame's locals, or None to skip capturing them
+            format_traceback: Whether to format traceback_str now rather than
+                on first access
+        """
+        try:
+            if f_locals is not None:
+                self.local_var_names, self.local_var_reprs = _capture_locals(f_locals)
+            self.source_code = _source_code(self.file_path, self.line_number)
+            if format_traceback:
+                self._format_traceback()
+        finally:
+            if self._ready is not None:
+                self._ready.set()
+    
+    @classmethod
+    def _capture(cls, exc_type, exc_value, tb) -> 'ErrorContext':
+        """Build a context holding only what is cheap to read off the traceback."""
         # Handle case where tb is None
         if tb is None:
-            return cls(
+            return cls._from_trusted(
                 exception_type=exc_type.__name__,
                 exception_message=str(exc_value),
                 target_fqn="unknown",
@@ -53,75 +284,191 @@ class ErrorContext(BaseModel):
                 line_number=0,
                 source_code="",
                 traceback_str=f"{exc_type.__name__}: {exc_value}",
-                local_vars={}
+                local_var_names=(),
+                local_var_reprs=()
             )
         
         # Get the frame where the exception occurred
         frame = tb.tb_frame
+        file_path = frame.f_code.co_filename
         
-        # Extract local variables
-        local_vars = {}
-        try:
-            local_vars = dict(frame.f_locals)
-        except Exception:
-            local_vars = {}
+        # Every value here is built locally, so there is nothing to validate.
+        # The exception is kept for traceback_str instead of formatting it now.
+        # Identifiers are interned so contexts of a recurring failure share
+        # them; source_code is already shared through the window cache.
+        return cls._from_trusted(
+            exc_info=(exc_type, exc_value, tb),
+            exception_type=sys.intern(exc_type.__name__),
+            exception_message=str(exc_value),
+            target_fqn=_target_fqn(frame),
+            file_path=sys.intern(file_path),
+            line_number=tb.tb_lineno,
+            source_code="",
+            local_var_names=(),
+            local_var_reprs=()
+        )
+    
+    @classmethod
+    def from_traceback(cls, exc_type, exc_value, tb,
+                       capture_locals: Optional[bool] = None) -> 'ErrorContext':
+        """Create ErrorContext from exception traceback info.
         
-        # Get file path and line number
-        file_path = frame.f_code.co_filename
-        line_number = tb.tb_lineno
+        Args:
+            exc_type: Exception class
+            exc_value: Exception instance
+            tb: Traceback of the exception
+            capture_locals: Whether to record the frame's locals. Defaults to
+                CAPTURE_LOCALS (the REFLEX_CAPTURE_LOCALS environment variable).
+        """
+        if capture_locals is None:
+            capture_locals = CAPTURE_LOCALS
+        ctx = cls._capture(exc_type, exc_value, tb)
+        if tb is not None:
+            ctx._enrich(tb.tb_frame.f_locals if capture_locals else None)
+        return ctx
+    
+    @classmethod
+    def capture_cheap(cls, exc_type, exc_value, tb,
+                      capture_locals: Optional[bool] = None) -> 'ErrorContext':
+        """Create ErrorContext and enrich it on a background thread.
+        
+        Only the exception type and message, target_fqn, file_path and
+        line_number are set on return. Call ready() before reading
+        source_code, local_vars or traceback_str.
         
-        # Try to get the function name and build FQN
-        func_name = frame.f_code.co_name
+        The frame's local bindings are copied here, so later assignments
+        don't show up in local_vars; the values themselves are repr'd on
+        the worker, so mutations made before then still can.
         
-        # Build a reasonable FQN
+        Args:
+            exc_type: Exception class
+            exc_value: Exception instance
+            tb: Traceback of the exception
+            capture_locals: Whether to record the frame's locals. Defaults to
+                CAPTURE_LOCALS (the REFLEX_CAPTURE_LOCALS environment variable).
+        """
+        if capture_locals is None:
+            capture_locals = CAPTURE_LOCALS
+        ctx = cls._capture(exc_type, exc_value, tb)
+        if tb is not None:
+            ctx._ready = threading.Event()
+            f_locals = dict(tb.tb_frame.f_locals) if capture_locals else None
+            _submit_enrichment(ctx, f_locals)
+        return ctx
+
+
+def _target_fqn(frame) -> str:
+    """Build a reasonable FQN for the function a frame runs, once per code object."""
+    code = frame.f_code
+    target_fqn = _FQN_CACHE.get(code)
+    if target_fqn is None:
+        func_name = code.co_name
         if func_name == '<module>':
             target_fqn = "unknown.module"
         else:
             # Try to get module name
             module_name = frame.f_globals.get('__name__', 'unknown')
-            target_fqn = f"{module_name}.{func_name}"
-        
-        # Get source code around the error
-        source_code = ""
+            target_fqn = sys.intern(f"{module_name}.{func_name}")
+        if len(_FQN_CACHE) >= FQN_CACHE_SIZE:
+            _FQN_CACHE.clear()
+        _FQN_CACHE[code] = target_fqn
+    return target_fqn
+
+
+def _capture_locals(f_locals: dict) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Capture the names and bounded reprs of a frame's locals in one pass.
+    
+    Reprs rather than the objects are kept, so large values are neither
+    copied nor kept alive by the context.
+    """
+    names = []
+    reprs = []
+    try:
+        for name, value in f_locals.items():
+            if not name.startswith(_SKIP_LOCAL_PREFIXES):
+                reprs.append(bounded_repr(value))
+                names.append(name)
+    except Exception:
+        pass
+    return tuple(names), tuple(reprs)
+
+
+def _source_code(file_path: str, line_number: int) -> str:
+    """Get source code around the error."""
+    try:
+        return _source_window(file_path, line_number)
+    except Exception:
+        return f"Could not retrieve source code for {file_path}:{line_number}"
+
+
+# Contexts from capture_cheap() wait here for the enrichment thread. When it
+# falls behind, the oldest waiting context is dropped so capturing never
+# blocks: it is marked ready with no source or locals (its traceback_str is
+# still formatted on demand).
+ENRICH_QUEUE_SIZE = 256
+_enrich_queue = queue.Queue(maxsize=ENRICH_QUEUE_SIZE)
+_enrich_thread = None
+_enrich_lock = threading.Lock()
+
+
+def _enrich_loop():
+    while True:
+        ctx, f_locals = _enrich_queue.get()
         try:
-            import linecache
-            # Get a few lines around the error
-            lines = []
-            for i in range(max(1, line_number - 2), line_number + 3):
-                line = linecache.getline(file_path, i)
-                if line:
-                    prefix = ">>> " if i == line_number else "    "
-                    lines.append(f"{prefix}{i}: {line.rstrip()}")
-            source_code = "\n".join(lines)
+            # The traceback is formatted before the context is marked ready,
+            # so nothing touches it once a consumer may release it
+            ctx._enrich(f_locals, format_traceback=True)
         except Exception:
-            source_code = f"Could not retrieve source code for {file_path}:{line_number}"
-        
-        # Get full traceback string
-        import traceback as tb_module
-        traceback_str = ''.join(tb_module.format_exception(exc_type, exc_value, tb))
-        
-        return cls(
-            exception_type=exc_type.__name__,
-            exception_message=str(exc_value),
-            target_fqn=target_fqn,
-            file_path=file_path,
-            line_number=line_number,
-            source_code=source_code,
-            traceback_str=traceback_str,
-            local_vars=local_vars
-        )
+            pass
+        finally:
+            del ctx, f_locals
+            _enrich_queue.task_done()
+
+
+def _start_enricher():
+    """Start the enrichment thread, or restart it after a fork."""
+    global _enrich_thread
+    with _enrich_lock:
+        if _enrich_thread is None or not _enrich_thread.is_alive():
+            _enrich_thread = threading.Thread(
+                target=_enrich_loop, name="reflexruntime-enricher", daemon=True
+            )
+            _enrich_thread.start()
+
+
+def _submit_enrichment(ctx: ErrorContext, f_locals: Optional[dict]):
+    """Queue a context for enrichment, dropping the oldest one if the queue is full."""
+    _start_enricher()
+    while True:
+        try:
+            _enrich_queue.put_nowait((ctx, f_locals))
+            return
+        except queue.Full:
+            try:
+                dropped, _ = _enrich_queue.get_nowait()
+            except queue.Empty:
+                continue
+            dropped._ready.set()
+            _enrich_queue.task_done()
+
+
+# dataclass(slots=True) needs Python 3.10+; older versions keep a __dict__
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
 
-class PatchProposal(BaseModel):
+@dataclass(**_DATACLASS_OPTIONS)
+class PatchProposal:
     """A proposed code patch from the LLM."""
     
     patch_code: str
     explanation: str
     confidence: float = 0.8
-    test_cases: List[str] = []
+    # An immutable default, so instances share it instead of each allocating one
+    test_cases: Sequence[str] = ()
 
 
-class PatchResult(BaseModel):
+@dataclass(**_DATACLASS_OPTIONS)
+class PatchResult:
     """Result of applying a patch."""
     
     patch_id: str
@@ -129,7 +476,7 @@ class PatchResult(BaseModel):
     original_code: str
     patched_code: str
     target_fqn: str
-    applied_at: datetime = None
-    error_message: str = None
+    applied_at: Optional[datetime] = None
+    error_message: Optional[str] = None
     original_function: Any = None
     patched_function: Any = None
@@ -0,0 +1,109 @@
+"""
+Tests for parsing LLM responses into patch proposals.
+"""
+
+import os
+import json
+import types
+import tempfile
+import unittest
+
+from reflexruntime.core.llm_client import LLMClient, _proposal_from_json
+from reflexruntime.core.schemas import ErrorContext
+
+
+def _make_client(response_text: str, cache_path: str) -> LLMClient:
+    """Build an LLMClient whose API replies with response_text in one chunk."""
+    client = LLMClient(api_key="sk-test", cache_path=cache_path)
+    
+    def create(**kwargs):
+        chunk = types.SimpleNamespace(
+            choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=response_text))]
+        )
+        return iter([chunk])
+    
+    client.client = types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=create))
+    )
+    return client
+
+
+def _error_context() -> ErrorContext:
+    return ErrorContext(
+        exception_type="ZeroDivisionError",
+        exception_message="division by zero",
+        target_fqn="module.divide",
+        source_code=">>> 2:     return a / b",
+        file_path="module.py",
+        line_number=2,
+        local_vars={},
+    )
+
+
+class ProposalFromJsonTest(unittest.TestCase):
+    
+    def test_valid_payload(self):
+        proposal = _proposal_from_json({
+            "patch_code": "def divide(a, b):\n    return 0\n",
+            "explanation": "guard zero",
+            "confidence": "0.9",
+            "test_cases": ["divide(1, 0)"],
+        })
+        self.assertEqual(proposal.confidence, 0.9)
+        self.assertEqual(proposal.test_cases, ("divide(1, 0)",))
+    
+    def test_single_test_case_string_is_wrapped(self):
+        proposal = _proposal_from_json({"patch_code": "", "test_cases": "divide(1, 0)"})
+        self.assertEqual(proposal.test_cases, ("divide(1, 0)",))
+    
+    def test_malformed_payloads_are_rejected(self):
+        for payload in (
+            ["not", "an", "object"],
+            {"patch_code": ["def divide(a, b): pass"]},
+            {"patch_code": "", "explanation": {"text": "guard zero"}},
+            {"patch_code": "", "confidence": None},
+            {"patch_code": "", "confidence": True},
+            {"patch_code": "", "test_cases": [1, 2]},
+            {"patch_code": "", "test_cases": {"case": "divide(1, 0)"}},
+        ):
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValueError):
+                    _proposal_from_json(payload)
+
+
+class MalformedResponseTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, "patch_cache.json")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_malformed_response_yields_no_proposal(self):
+        response = json.dumps({
+            "patch_code": 42,
+            "explanation": ["guard", "zero"],
+            "confidence": 0.9,
+            "test_cases": "divide(1, 0)",
+        })
+        client = _make_client(response, self.cache_path)
+        result = client.analyze_exception_and_generate_patch_with_raw(_error_context())
+        self.assertIsNone(result)
+        self.assertFalse(os.path.exists(self.cache_path))
+    
+    def test_valid_response_yields_proposal(self):
+        response = json.dumps({
+            "patch_code": "def divide(a, b):\n    return a / b if b else 0\n",
+            "explanation": "guard zero",
+            "confidence": 0.9,
+            "test_cases": ["divide(1, 0)"],
+        })
+        client = _make_client(response, self.cache_path)
+        proposal, raw = client.analyze_exception_and_generate_patch_with_raw(_error_context())
+        self.assertEqual(proposal.explanation, "guard zero")
+        self.assertEqual(raw, response)
+
+
+if __name__ == "__main__":
+    unittest.main()
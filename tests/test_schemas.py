@@ -0,0 +1,64 @@
+"""
+Tests for capturing exceptions into ErrorContext.
+"""
+
+import sys
+import unittest
+
+from reflexruntime.core.schemas import ErrorContext
+
+
+def _divide(a, b):
+    return a / b
+
+
+def _lookup(mapping, key):
+    return mapping[key]
+
+
+class CaptureTest(unittest.TestCase):
+    
+    def test_from_traceback_fills_every_field(self):
+        try:
+            _divide(1, 0)
+        except ZeroDivisionError:
+            ctx = ErrorContext.from_traceback(*sys.exc_info(), capture_locals=True)
+        self.assertEqual(ctx.exception_type, "ZeroDivisionError")
+        self.assertIn(">>> ", ctx.source_code)
+        self.assertIn("self", ctx.local_vars)
+        self.assertIn("ZeroDivisionError: division by zero", ctx.traceback_str)
+    
+    def test_capture_cheap_snapshots_locals(self):
+        before = "captured"
+        try:
+            _divide(1, 0)
+        except ZeroDivisionError:
+            ctx = ErrorContext.capture_cheap(*sys.exc_info(), capture_locals=True)
+        after = "assigned after capture"
+        self.assertTrue(ctx.ready(5))
+        self.assertEqual(ctx.local_vars["before"], repr(before))
+        self.assertNotIn("after", ctx.local_vars)
+        ErrorContext.release(ctx)
+    
+    def test_recycled_context_keeps_its_own_traceback(self):
+        for _ in range(200):
+            try:
+                _divide(1, 0)
+            except ZeroDivisionError:
+                first = ErrorContext.capture_cheap(*sys.exc_info(), capture_locals=False)
+            self.assertTrue(first.ready(5))
+            ErrorContext.release(first)
+            
+            try:
+                _lookup({}, "missing")
+            except KeyError:
+                second = ErrorContext.capture_cheap(*sys.exc_info(), capture_locals=False)
+            self.assertTrue(second.ready(5))
+            self.assertEqual(second.exception_type, "KeyError")
+            self.assertIn("KeyError: 'missing'", second.traceback_str)
+            self.assertNotIn("ZeroDivisionError", second.traceback_str)
+            ErrorContext.release(second)
+
+
+if __name__ == "__main__":
+    unittest.main()